@@ -0,0 +1,78 @@
+from logger import get_logger
+
+import argparse
+import json
+import sys
+
+from logging import Logger
+
+logger: Logger = get_logger("cli")
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Search eBay and Amazon from the command line")
+    arg_parser.add_argument("query", nargs="?", default=None, help="Product query")
+    arg_parser.add_argument("--batch", default=None,
+                            help="File with one query per line; related queries share a single scrape")
+    arg_parser.add_argument("--distributed", action="store_true", help="Run the search through the work queue")
+    arg_parser.add_argument("--limit", type=int, default=None, help="Maximum number of products to print")
+    arg_parser.add_argument("--refresh", action="store_true", help="Ignore the catalog index and scrape live")
+    arg_parser.add_argument("--index-only", action="store_true", help="Answer from the catalog index without scraping")
+    args = arg_parser.parse_args()
+    if (args.query is None) == (args.batch is None):
+        arg_parser.error("give either a query or --batch")
+
+    from config import get_config
+
+    config = get_config()
+    catalog = None
+    if config.CATALOG_ENABLED or args.index_only:
+        from services.catalog_index import get_catalog_index
+        catalog = get_catalog_index()
+    history = None
+    if config.HISTORY_ENABLED and not args.index_only:
+        from services.price_history import get_price_history
+        history = get_price_history()
+
+    if args.batch is not None:
+        with open(args.batch, encoding="utf-8") as f:
+            queries = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+        if args.index_only:
+            results = {query: catalog.search(query, max_age_seconds=catalog.max_age_seconds) for query in queries}
+        else:
+            from main_parser import MainParser
+            from services.scheduler import Lane
+
+            results = MainParser(None, catalog, lane=Lane.BATCH, history=history).search_many(queries, refresh=args.refresh)
+        failed = [query for query, products in results.items() if products is None]
+        # Catalog and work queue products skip validation and keep their URLs as str, hence warnings=False
+        for query, products in results.items():
+            for product in (products or [])[:args.limit]:
+                sys.stdout.write(json.dumps({"query": query, **product.model_dump(mode="json", warnings=False)}) + "\n")
+        logger.info(
+            "%d products written for %d queries",
+            sum(len(products or []) for products in results.values()), len(results) - len(failed)
+        )
+        if failed:
+            sys.exit(f"{len(failed)} queries failed: {', '.join(failed)}")
+        return
+
+    if args.index_only:
+        products = catalog.search(args.query, max_age_seconds=catalog.max_age_seconds)
+    else:
+        from main_parser import MainParser
+
+        work_queue = None
+        if args.distributed:
+            from services.work_queue import get_work_queue
+            work_queue = get_work_queue()
+
+        products = MainParser(work_queue, catalog, history=history).search(args.query, refresh=args.refresh)
+    if args.limit is not None:
+        products = products[:args.limit]
+
+    for product in products:
+        sys.stdout.write(json.dumps(product.model_dump(mode="json", warnings=False)) + "\n")
+    logger.info("%d products written for '%s'", len(products), args.query)
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ from dotenv import load_dotenv
 from pydantic import HttpUrl
 
 import os
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 
 load_dotenv()
@@ -9,7 +10,44 @@ load_dotenv()
 class Config(BaseSettings):
     AMAZON_URL: HttpUrl = os.getenv("AMAZON_URL")
     EBAY_URL: HttpUrl = os.getenv("EBAY_URL")
+    AMAZON_MIN_DELAY_SECONDS: float = float(os.getenv("AMAZON_MIN_DELAY_SECONDS", "1"))
+    AMAZON_MAX_DELAY_SECONDS: float = float(os.getenv("AMAZON_MAX_DELAY_SECONDS", "3"))
+    QUEUE_BACKEND: str = os.getenv("QUEUE_BACKEND", "sqlite")
+    QUEUE_URL: str = os.getenv("QUEUE_URL", "work_queue.db")
+    QUEUE_LEASE_SECONDS: int = int(os.getenv("QUEUE_LEASE_SECONDS", "60"))
+    QUEUE_MAX_ATTEMPTS: int = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))
+    DISTRIBUTED_MODE: bool = os.getenv("DISTRIBUTED_MODE", "false").lower() == "true"
+    SEARCH_DEADLINE_SECONDS: float = float(os.getenv("SEARCH_DEADLINE_SECONDS", "20"))
+    SCHEDULER_MAX_CONCURRENCY: int = int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "4"))
+    SCHEDULER_RESERVED_INTERACTIVE: int = int(os.getenv("SCHEDULER_RESERVED_INTERACTIVE", "1"))
+    SCHEDULER_INTERACTIVE_WEIGHT: float = float(os.getenv("SCHEDULER_INTERACTIVE_WEIGHT", "8"))
+    SCHEDULER_SHARED_PATH: str = os.getenv("SCHEDULER_SHARED_PATH", "admission.db")
+    SLO_INTERACTIVE_SECONDS: float = float(os.getenv("SLO_INTERACTIVE_SECONDS", "0.5"))
+    SLO_BATCH_SECONDS: float = float(os.getenv("SLO_BATCH_SECONDS", "60"))
+    HTTP_TRANSPORT: str = os.getenv("HTTP_TRANSPORT", "http1")
+    CATALOG_ENABLED: bool = os.getenv("CATALOG_ENABLED", "true").lower() == "true"
+    CATALOG_PATH: str = os.getenv("CATALOG_PATH", "catalog.db")
+    CATALOG_MAX_AGE_SECONDS: float = float(os.getenv("CATALOG_MAX_AGE_SECONDS", "3600"))
+    HISTORY_ENABLED: bool = os.getenv("HISTORY_ENABLED", "true").lower() == "true"
+    RANK_WEIGHT_PRICE: float = float(os.getenv("RANK_WEIGHT_PRICE", "0.4"))
+    RANK_WEIGHT_RATING: float = float(os.getenv("RANK_WEIGHT_RATING", "0.3"))
+    RANK_WEIGHT_SOLD: float = float(os.getenv("RANK_WEIGHT_SOLD", "0.2"))
+    RANK_WEIGHT_REVIEWS: float = float(os.getenv("RANK_WEIGHT_REVIEWS", "0.1"))
+    PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_INTERVAL_MS: float = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+    PROFILE_TRACEMALLOC: bool = os.getenv("PROFILE_TRACEMALLOC", "true").lower() == "true"
+    IMAGE_PIPELINE: bool = os.getenv("IMAGE_PIPELINE", "false").lower() == "true"
+    THUMBNAIL_CACHE_DIR: str = os.getenv("THUMBNAIL_CACHE_DIR", ".thumbnail_cache")
+    THUMBNAIL_CACHE_MAX_MB: int = int(os.getenv("THUMBNAIL_CACHE_MAX_MB", "64"))
     class Config:
         env_file = ".env"
 
-config = Config()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    return Config()
+
+def __getattr__(name: str):
+    if name == "config":
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
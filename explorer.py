@@ -0,0 +1,80 @@
+import numpy as np
+
+from typing import Dict, Iterable, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+class ProductExplorer:
+    """
+    Read-only query index over a results DataFrame for the DATA EXPLORER tab.
+
+    Rows are sorted by price once at construction; each source keeps the
+    (ascending) positions of its rows in that order. A price range is then
+    two binary searches per source, counting is free, and only the rows of
+    the requested page are ever materialized.
+    """
+
+    def __init__(self, df: "pd.DataFrame"):
+        prices = df['PRICE'].to_numpy(dtype=np.float64)
+        order = np.argsort(prices, kind="stable")
+        self.frame: "pd.DataFrame" = df.iloc[order].reset_index(drop=True)
+        self.prices: np.ndarray = prices[order]
+        sources = self.frame['SOURCE'].to_numpy()
+        self.sources: Tuple[str, ...] = tuple(sorted(set(sources.tolist())))
+        self.positions: Dict[str, np.ndarray] = {
+            source: np.flatnonzero(sources == source) for source in self.sources
+        }
+        self.source_prices: Dict[str, np.ndarray] = {
+            source: self.prices[positions] for source, positions in self.positions.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def min_price(self) -> float:
+        return float(self.prices[0]) if len(self.prices) else 0.0
+
+    @property
+    def max_price(self) -> float:
+        return float(self.prices[-1]) if len(self.prices) else 0.0
+
+    def _ranges(self, sources: Iterable[str], low: float, high: float) -> Dict[str, Tuple[int, int]]:
+        ranges: Dict[str, Tuple[int, int]] = {}
+        for source in sources:
+            source_prices = self.source_prices.get(source)
+            if source_prices is None:
+                continue
+            start = int(np.searchsorted(source_prices, low, side="left"))
+            end = int(np.searchsorted(source_prices, high, side="right"))
+            if end > start:
+                ranges[source] = (start, end)
+        return ranges
+
+    def count(self, sources: Iterable[str], low: float, high: float) -> int:
+        return sum(end - start for start, end in self._ranges(sources, low, high).values())
+
+    def _positions(self, sources: Iterable[str], low: float, high: float, stop: int, descending: bool) -> np.ndarray:
+        ranges = self._ranges(sources, low, high)
+        parts = []
+        for source, (start, end) in ranges.items():
+            positions = self.positions[source]
+            if descending:
+                parts.append(positions[max(start, end - stop):end])
+            else:
+                parts.append(positions[start:min(end, start + stop)])
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        merged = np.sort(np.concatenate(parts), kind="stable")
+        return merged[::-1][:stop] if descending else merged[:stop]
+
+    def page(self, sources: Iterable[str], low: float, high: float, page: int = 0,
+             page_size: int = 50, descending: bool = False) -> "pd.DataFrame":
+        offset: int = max(page, 0) * page_size
+        positions = self._positions(sources, low, high, offset + page_size, descending)
+        return self.frame.iloc[positions[offset:offset + page_size]]
+
+    def filtered(self, sources: Iterable[str], low: float, high: float, descending: bool = False) -> "pd.DataFrame":
+        positions = self._positions(sources, low, high, len(self.frame), descending)
+        return self.frame.iloc[positions]
@@ -0,0 +1,45 @@
+import argparse
+import subprocess
+import sys
+
+from typing import Dict
+
+BUDGETS_MS: Dict[str, float] = {
+    "config": 250.0,
+    "main_parser": 300.0,
+    "worker": 300.0,
+    "cli": 50.0
+}
+
+def measure_import_ms(module: str) -> float:
+    """Cumulative import time of `module` in a fresh interpreter, from -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not import {module}:\n{result.stderr}")
+
+    for line in reversed(result.stderr.splitlines()):
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"No importtime entry for {module}")
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description="Check cold-start import times against the budget")
+    arg_parser.add_argument("modules", nargs="*", default=list(BUDGETS_MS))
+    arg_parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget, e.g. for slow CI hosts")
+    args = arg_parser.parse_args()
+
+    over_budget: bool = False
+    for module in args.modules:
+        budget: float = BUDGETS_MS.get(module, 300.0) * args.scale
+        elapsed: float = measure_import_ms(module)
+        status: str = "ok" if elapsed <= budget else "OVER"
+        over_budget = over_budget or elapsed > budget
+        print(f"{module:<15} {elapsed:8.1f} ms  (budget {budget:.0f} ms)  {status}")
+    return 1 if over_budget else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+from mock_marketplace import FaultProfile, run_server
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import socket
+import time
+
+from typing import Any, Dict, List, Optional
+
+QUERIES: List[str] = ["iphone 15", "gaming laptop", "wireless earbuds", "4k monitor", "mechanical keyboard",
+                      "air fryer", "running shoes", "espresso machine", "usb c hub", "smart watch"]
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+async def _wait_for_server(port: int, timeout: float = 10.0):
+    deadline: float = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Mock marketplace did not start on port {port}")
+
+async def run_step(parser, concurrency: int, duration: float) -> Dict[str, Any]:
+    from schema import ParserSource
+
+    latencies: List[float] = []
+    searches: int = 0
+    source_errors: Dict[str, int] = {source.value: 0 for source in ParserSource}
+    stop_at: float = time.monotonic() + duration
+
+    async def user(index: int):
+        nonlocal searches
+        i: int = index
+        while time.monotonic() < stop_at:
+            started: float = time.monotonic()
+            products = await parser.merge_parse(QUERIES[i % len(QUERIES)])
+            latencies.append(time.monotonic() - started)
+            searches += 1
+            found = {product.parsed_source.value for product in products}
+            for source in source_errors:
+                if source not in found:
+                    source_errors[source] += 1
+            i += concurrency
+
+    step_started: float = time.monotonic()
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+    elapsed: float = time.monotonic() - step_started
+
+    return {
+        "concurrency": concurrency,
+        "searches": searches,
+        "throughput": searches / elapsed if elapsed else 0.0,
+        "p50": _percentile(latencies, 50),
+        "p99": _percentile(latencies, 99),
+        "error_rate": {source: count / searches if searches else 0.0 for source, count in source_errors.items()},
+        "rss_mb": _rss_mb()
+    }
+
+async def drive(port: int, max_concurrency: int, step_seconds: float, saturation_gain: float) -> Dict[str, Any]:
+    from main_parser import MainParser
+    from services.http_pool import close_session, get_session
+    from services.transport import get_transport
+
+    await _wait_for_server(port)
+    parser = MainParser()
+    steps: List[Dict[str, Any]] = []
+    concurrency: int = 1
+    try:
+        while concurrency <= max_concurrency:
+            step = await run_step(parser, concurrency, step_seconds)
+            steps.append(step)
+            errors = ", ".join(f"{source} {rate:.0%}" for source, rate in step["error_rate"].items())
+            print(
+                f"c={concurrency:<4} {step['throughput']:7.2f} searches/s  "
+                f"p50 {step['p50'] or 0:6.2f}s  p99 {step['p99'] or 0:6.2f}s  "
+                f"errors [{errors}]  rss {step['rss_mb']:.0f} MB",
+                flush=True
+            )
+            if len(steps) > 1 and step["throughput"] < steps[-2]["throughput"] * (1 + saturation_gain):
+                print(f"Saturated at concurrency {steps[-2]['concurrency']}")
+                break
+            concurrency *= 2
+
+        session = await get_session()
+        async with session.get(f"http://127.0.0.1:{port}/stats") as response:
+            server_stats: Dict[str, int] = await response.json()
+    finally:
+        await get_transport().close()
+        await close_session()
+
+    return {"steps": steps, "server": server_stats}
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Push MainParser to saturation against the mock marketplace")
+    arg_parser.add_argument("--max-concurrency", type=int, default=64)
+    arg_parser.add_argument("--step-seconds", type=float, default=10.0)
+    arg_parser.add_argument("--saturation-gain", type=float, default=0.05,
+                            help="Stop ramping once doubling concurrency gains less than this fraction")
+    arg_parser.add_argument("--json", default=None, help="Write the full report to this file")
+    for name, field in FaultProfile.model_fields.items():
+        arg_parser.add_argument(f"--{name.replace('_', '-')}", type=type(field.default), default=field.default)
+    args = vars(arg_parser.parse_args())
+
+    max_concurrency, step_seconds = args.pop("max_concurrency"), args.pop("step_seconds")
+    saturation_gain, json_path = args.pop("saturation_gain"), args.pop("json")
+    profile = FaultProfile(**args)
+
+    port: int = _free_port()
+    os.environ["AMAZON_URL"] = f"http://127.0.0.1:{port}/amazon/s?k="
+    os.environ["EBAY_URL"] = f"http://127.0.0.1:{port}/ebay/"
+    os.environ["AMAZON_MIN_DELAY_SECONDS"] = "0"
+    os.environ["AMAZON_MAX_DELAY_SECONDS"] = "0"
+    # Set unconditionally: .env may cap admission far below the ramp and hide the real saturation point
+    os.environ["SCHEDULER_MAX_CONCURRENCY"] = str(max_concurrency)
+    os.environ["SCHEDULER_SHARED_PATH"] = ""
+
+    server = multiprocessing.Process(target=run_server, args=(profile, "127.0.0.1", port), daemon=True)
+    server.start()
+    try:
+        report = asyncio.run(drive(port, max_concurrency, step_seconds, saturation_gain))
+    finally:
+        server.terminate()
+        server.join()
+
+    print(f"Server outcomes: {report['server']}")
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"profile": profile.model_dump(), **report}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,194 @@
-from logging import Logger, getLogger, StreamHandler, Formatter, DEBUG
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from datetime import datetime, timezone
+from logging import Filter, Formatter, Handler, Logger, LogRecord, StreamHandler, getLogger, getLevelName, DEBUG, WARNING
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, Tuple
+
+TEXT_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+_RECORD_ATTRS = frozenset(vars(LogRecord("", 0, "", 0, "", (), None)).keys()) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(Formatter):
+    def format(self, record: LogRecord) -> str:
+        entry: Dict[str, object] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(Formatter):
+    def format(self, record: LogRecord) -> str:
+        line: str = super().format(record)
+        suppressed: Optional[int] = getattr(record, "suppressed", None)
+        return f"{line} [+{suppressed} similar suppressed]" if suppressed else line
+
+
+class RateLimitFilter(Filter):
+    """
+    Lets through at most `limit` records per message key per `window`
+    seconds; the key is the logger name, level and the unformatted message
+    template, so "Could not parse price for ASIN %s" is one key however many
+    ASINs fail. Dropped records are counted and reported on the next record
+    of that key after the window rolls over (as `suppressed`), or by
+    `flush()` at shutdown. ERROR and above are never limited.
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int = 4096):
+        super().__init__()
+        self.limit: int = limit
+        self.window: float = window
+        self.max_keys: int = max_keys
+        self._lock: threading.Lock = threading.Lock()
+        self._windows: Dict[Tuple[str, int, str], List] = {}
+
+    def filter(self, record: LogRecord) -> bool:
+        if self.limit <= 0 or record.levelno > WARNING:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now: float = time.monotonic()
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None and len(self._windows) >= self.max_keys:
+                # Mostly one-off messages: forget keys that have not been limited yet.
+                self._windows = {k: s for k, s in self._windows.items() if s[2] or s[1] >= self.limit}
+            if state is None or now - state[0] >= self.window:
+                suppressed: int = state[2] if state else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if state[1] < self.limit:
+                state[1] += 1
+                return True
+            state[2] += 1
+            return False
+
+    def flush(self) -> List[LogRecord]:
+        with self._lock:
+            pending = [(key, state[2]) for key, state in self._windows.items() if state[2]]
+            self._windows.clear()
+        records: List[LogRecord] = []
+        for (name, level, msg), count in pending:
+            record = LogRecord(name, level, "", 0, "%d similar messages suppressed: %s", (count, msg), None)
+            record.suppressed = count
+            records.append(record)
+        return records
+
+
+_IMMUTABLE_ARGS = (str, int, float, bool, bytes, type(None))
+
+def _snapshot(arg: object) -> object:
+    return arg if isinstance(arg, _IMMUTABLE_ARGS) else str(arg)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler.prepare() formats in the caller; leave that to the writer
+    thread. Scalar arguments are passed through as-is, anything else is
+    rendered with str() now so a later mutation cannot change the message.
+    """
+
+    def prepare(self, record: LogRecord) -> LogRecord:
+        if isinstance(record.args, tuple):
+            if not all(isinstance(arg, _IMMUTABLE_ARGS) for arg in record.args):
+                record.args = tuple(_snapshot(arg) for arg in record.args)
+        elif isinstance(record.args, dict):
+            record.args = {key: _snapshot(value) for key, value in record.args.items()}
+        return record
+
+
+class _Pipeline:
+    def __init__(self):
+        from dotenv import load_dotenv
+        load_dotenv()
+
+        self.level: int = getLevelName(os.getenv("LOG_LEVEL", "DEBUG").upper())
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.rate_limit: RateLimitFilter = RateLimitFilter(
+            int(os.getenv("LOG_RATE_LIMIT", "20")), float(os.getenv("LOG_RATE_WINDOW_SECONDS", "60"))
+        )
+        self.handler: QueueHandler = _DeferredQueueHandler(self.queue)
+        self.handler.addFilter(self.rate_limit)
+
+        self.writer: Handler = StreamHandler(sys.stderr)
+        if os.getenv("LOG_FORMAT", "json").lower() == "json":
+            self.writer.setFormatter(JsonFormatter())
+        else:
+            self.writer.setFormatter(TextFormatter(TEXT_FORMAT))
+        self.listener: QueueListener = QueueListener(self.queue, self.writer)
+        self.listener.start()
+        self.stopped: bool = False
+        atexit.register(self.stop)
+        from multiprocessing.util import register_after_fork
+        register_after_fork(self, _Pipeline._drain_at_process_exit)
+
+    def restart_in_child(self):
+        # A forked child inherits the queue but not the writer thread
+        self.listener = QueueListener(self.queue, self.writer)
+        self.listener.start()
+        self.stopped = False
+
+    def _drain_at_process_exit(self):
+        # multiprocessing children leave through os._exit, which skips atexit
+        from multiprocessing.util import Finalize
+        Finalize(self, self.stop, exitpriority=0)
+
+    def stop(self):
+        if self.stopped:
+            return
+        self.stopped = True
+        for record in self.rate_limit.flush():
+            self.queue.put_nowait(record)
+        self.listener.stop()
+
+
+_pipeline: Optional[_Pipeline] = None
+_pipeline_lock: threading.Lock = threading.Lock()
+
+def _get_pipeline() -> _Pipeline:
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = _Pipeline()
+    return _pipeline
+
+def _after_fork_in_child():
+    global _pipeline_lock
+    _pipeline_lock = threading.Lock()
+    if _pipeline is not None:
+        _pipeline.restart_in_child()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
 
 def get_logger(__name__: str) -> Logger:
+    """
+    Loggers share one queue-backed pipeline: callers only enqueue the record,
+    and a background thread formats (JSON by default, LOG_FORMAT=text for the
+    old layout) and writes to stderr. Pass arguments %-style
+    (`logger.warning("... %s", asin)`) so formatting stays off the event loop
+    and the rate limiter can group messages by template.
+    """
     logger: Logger = getLogger(__name__)
     if not logger.handlers:
-        handler: StreamHandler = StreamHandler()
-        fmt: Formatter = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        handler.setFormatter(Formatter(fmt))
-        logger.addHandler(handler)
-        logger.setLevel(DEBUG)
+        pipeline = _get_pipeline()
+        logger.addHandler(pipeline.handler)
+        logger.setLevel(pipeline.level if isinstance(pipeline.level, int) else DEBUG)
         logger.propagate = False
-    return logger
\ No newline at end of file
+    return logger
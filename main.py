@@ -1,20 +1,20 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 
-import asyncio
 from datetime import datetime
 
-from services.basic_service import ParserClass
-from services.amazon_service import AmazonService
-from services.ebay_service import EbayService
+from main_parser import MainParser
+from services.latency import latency_report
+from services.scheduler import scheduler_report
+from services.selector_health import selector_metrics
 from schema import ProductSchema
-from logger import get_logger
-from typing import List
+from config import get_config
+from typing import List, Optional, TYPE_CHECKING
 from utill import replace_spaces
+from query_normalization import canonicalize
 
-fig = go.Figure()
+if TYPE_CHECKING:
+    import pandas as pd
+    from ranking import RankingWeights
 
 st.set_page_config(
     page_title="Product Intelligence Dashboard",
@@ -213,51 +213,9 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-class MainParser:
-    def __init__(self):
-        self.ebay_parser: ParserClass = EbayService()
-        self.amazon_parser: ParserClass = AmazonService()
-        self.logger = get_logger("main-parser")
-    
-    async def merge_parse(self, prompt: str) -> List[ProductSchema]:
-        self.logger.info(f"Starting concurrent parsing for: '{prompt}'")
-        
-        try:
-            ebay_task = self.ebay_parser.parse(prompt)
-            amazon_task = self.amazon_parser.parse(prompt)
-            
-            ebay_products, amazon_products = await asyncio.gather(
-                ebay_task, 
-                amazon_task,
-                return_exceptions=True
-            )
-            
-            if isinstance(ebay_products, Exception):
-                self.logger.error(f"eBay parsing failed: {ebay_products}")
-                ebay_products = []
-            
-            if isinstance(amazon_products, Exception):
-                self.logger.error(f"Amazon parsing failed: {amazon_products}")
-                amazon_products = []
-            
-            merged_products = ebay_products + amazon_products
-            
-            self.logger.info(
-                f"Parsing complete - eBay: {len(ebay_products)}, "
-                f"Amazon: {len(amazon_products)}, "
-                f"Total: {len(merged_products)}"
-            )
-            
-            return merged_products
-        
-        except Exception as e:
-            self.logger.error(f"Error in merge_parse: {e}")
-            return []
-    
-    def parse(self, prompt: str) -> List[ProductSchema]:
-        return asyncio.run(self.merge_parse(prompt))
+def insert_into_df(products: List[ProductSchema]) -> "pd.DataFrame":
+    import pandas as pd
 
-def insert_into_df(products: List[ProductSchema]) -> pd.DataFrame:
     if not products:
         return pd.DataFrame()
     
@@ -278,7 +236,9 @@ def insert_into_df(products: List[ProductSchema]) -> pd.DataFrame:
     df = pd.DataFrame(data)
     return df
 
-def create_price_comparison_chart(df: pd.DataFrame):
+def create_price_comparison_chart(df: "pd.DataFrame"):
+    import plotly.express as px
+
     fig = px.box(
         df, 
         x='SOURCE', 
@@ -300,7 +260,73 @@ def create_price_comparison_chart(df: pd.DataFrame):
     fig.update_yaxes(gridcolor='#8FABD4', gridwidth=0.5)
     return fig
 
-def create_price_scatter(df: pd.DataFrame):
+def create_price_trend_chart(trend: List[dict], granularity: str = 'day'):
+    import pandas as pd
+    import plotly.express as px
+
+    trend_df = pd.DataFrame(trend)
+    trend_df['PERIOD'] = pd.to_datetime(trend_df['bucket_start'], unit='s')
+    fig = px.line(
+        trend_df,
+        x='PERIOD',
+        y='median_price',
+        color='source',
+        markers=True,
+        hover_data={'min_price': ':.2f', 'max_price': ':.2f', 'sample_count': True},
+        title=f'Median Price Trend ({granularity}ly)',
+        labels={'median_price': 'Median Price (USD)', 'PERIOD': 'Period', 'source': 'Marketplace'},
+        color_discrete_map={'EBAY': '#4A70A9', 'AMAZON': '#8FABD4', 'ALL': '#000000'}
+    )
+    fig.update_layout(
+        height=400,
+        plot_bgcolor='#EFECE3',
+        paper_bgcolor='#FFFFFF',
+        font=dict(color='#000000', family='Inter'),
+        title_font=dict(size=16, color='#000000', family='Inter')
+    )
+    fig.update_xaxes(gridcolor='#8FABD4', gridwidth=0.5)
+    fig.update_yaxes(gridcolor='#8FABD4', gridwidth=0.5)
+    return fig
+
+def create_product_trend_chart(trend: List[dict], granularity: str = 'day'):
+    import pandas as pd
+    import plotly.express as px
+
+    trend_df = pd.DataFrame(trend)
+    trend_df['PERIOD'] = pd.to_datetime(trend_df['bucket_start'], unit='s')
+    fig = px.line(
+        trend_df,
+        x='PERIOD',
+        y=['min_price', 'median_price', 'max_price'],
+        markers=True,
+        title=f'Listing Price Trend ({granularity}ly)',
+        labels={'value': 'Price (USD)', 'PERIOD': 'Period', 'variable': 'Statistic'},
+        color_discrete_sequence=['#8FABD4', '#000000', '#4A70A9']
+    )
+    fig.update_layout(
+        height=350,
+        plot_bgcolor='#EFECE3',
+        paper_bgcolor='#FFFFFF',
+        font=dict(color='#000000', family='Inter'),
+        title_font=dict(size=16, color='#000000', family='Inter')
+    )
+    fig.update_xaxes(gridcolor='#8FABD4', gridwidth=0.5)
+    fig.update_yaxes(gridcolor='#8FABD4', gridwidth=0.5)
+    return fig
+
+@st.cache_resource
+def load_price_history():
+    from services.price_history import get_price_history
+    return get_price_history()
+
+@st.cache_resource
+def load_catalog_index():
+    from services.catalog_index import get_catalog_index
+    return get_catalog_index()
+
+def create_price_scatter(df: "pd.DataFrame"):
+    import plotly.express as px
+
     fig = px.scatter(
         df,
         x='PRICE',
@@ -323,18 +349,22 @@ def create_price_scatter(df: pd.DataFrame):
     fig.update_yaxes(gridcolor='#8FABD4', gridwidth=0.5)
     return fig
 
-def create_top_products_chart(df: pd.DataFrame, n: int = 10):
-    top_df = df.nsmallest(n, 'PRICE')[['TITLE', 'PRICE', 'SOURCE']].copy()
+def create_top_products_chart(df: "pd.DataFrame", n: int = 10, weights: Optional["RankingWeights"] = None):
+    import plotly.express as px
+    from ranking import rank_products
+
+    top_df = rank_products(df, k=n, weights=weights)[['TITLE', 'PRICE', 'SOURCE', 'SCORE']].copy()
     top_df['TITLE_SHORT'] = top_df['TITLE'].str[:45] + '...'
     
     fig = px.bar(
         top_df,
-        x='PRICE',
+        x='SCORE',
         y='TITLE_SHORT',
         color='SOURCE',
         orientation='h',
+        hover_data=['PRICE'],
         title=f'Top {n} Best Value Products',
-        labels={'PRICE': 'Price (USD)', 'TITLE_SHORT': 'Product'},
+        labels={'SCORE': 'Value Score', 'PRICE': 'Price (USD)', 'TITLE_SHORT': 'Product'},
         color_discrete_map={'EBAY': '#4A70A9', 'AMAZON': '#8FABD4'}
     )
     fig.update_layout(
@@ -348,7 +378,7 @@ def create_top_products_chart(df: pd.DataFrame, n: int = 10):
     fig.update_xaxes(gridcolor='#8FABD4', gridwidth=0.5)
     return fig
 
-def create_metrics_row(df: pd.DataFrame):
+def create_metrics_row(df: "pd.DataFrame"):
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
@@ -391,6 +421,7 @@ def create_metrics_row(df: pd.DataFrame):
         st.markdown('</div>', unsafe_allow_html=True)
 
 def main():
+    config = get_config()
     st.markdown('<h1 class="main-header">Product Intelligence Dashboard</h1>', unsafe_allow_html=True)
     st.markdown('<p class="sub-header">Multi-Platform Price Analysis & Market Intelligence System</p>', unsafe_allow_html=True)
     
@@ -403,6 +434,12 @@ def main():
         help="Input the product identifier for analysis"
     )
     
+    refresh = st.sidebar.checkbox(
+        "Force live scrape",
+        value=False,
+        help="Ignore the local catalog index and fetch fresh listings"
+    )
+    
     search_button = st.sidebar.button("EXECUTE SEARCH", type="primary", use_container_width=True)
     
     if 'df' not in st.session_state:
@@ -413,9 +450,19 @@ def main():
     if search_button and search_query:
         with st.spinner('Processing query... Fetching data from multiple sources...'):
             try:
-                preprocessed = replace_spaces(search_query)
-                service = MainParser()
-                products = service.parse(preprocessed)
+                preprocessed = canonicalize(search_query).text
+                work_queue = None
+                if config.DISTRIBUTED_MODE:
+                    from services.work_queue import get_work_queue
+                    work_queue = get_work_queue()
+                catalog = None
+                if config.CATALOG_ENABLED:
+                    catalog = load_catalog_index()
+                history = None
+                if config.HISTORY_ENABLED:
+                    history = load_price_history()
+                service = MainParser(work_queue, catalog, history=history)
+                products = service.search(preprocessed, refresh=refresh)
                 
                 if products:
                     df = insert_into_df(products)
@@ -427,7 +474,33 @@ def main():
             except Exception as e:
                 st.error(f"✗ System Error: {str(e)}")
     
+    latency = latency_report()
+    if any(stats["samples"] for stats in latency.values()):
+        with st.sidebar.expander("SOURCE LATENCY"):
+            for source, stats in latency.items():
+                if stats["samples"]:
+                    st.markdown(f"**{source}** p50 {stats['p50']:.2f}s · p99 {stats['p99']:.2f}s")
+            for source, lanes in scheduler_report().items():
+                for lane, stats in lanes.items():
+                    if stats["slo_attainment"] is not None:
+                        st.markdown(
+                            f"**{source} {lane.lower()}** wait p95 {stats['p95_wait']:.2f}s · "
+                            f"SLO {stats['slo_attainment']:.0%}"
+                        )
+    
+    selectors = selector_metrics()
+    if any(metrics["coverage"] for metrics in selectors.values()):
+        with st.sidebar.expander("SELECTOR HEALTH"):
+            for marketplace, metrics in selectors.items():
+                for field, coverage in metrics["coverage"].items():
+                    if coverage is not None:
+                        flag = " ⚠ drift" if metrics["drifted"][field] else ""
+                        st.markdown(f"**{marketplace}.{field}** coverage {coverage:.0%}{flag}")
+    
     if st.session_state.df is not None and not st.session_state.df.empty:
+        import pandas as pd
+        import plotly.express as px
+        
         df = st.session_state.df
         
         st.markdown(f'<div class="section-header">ANALYSIS RESULTS: {st.session_state.search_term.upper()}</div>', unsafe_allow_html=True)
@@ -493,7 +566,7 @@ def main():
                     color=range_counts.values,
                     color_continuous_scale=[[0, '#8FABD4'], [1, '#4A70A9']]
                 )
-                fig.update_layout(
+                fig_bar.update_layout(
                     plot_bgcolor='#EFECE3',
                     paper_bgcolor='#FFFFFF',
                     font=dict(color='#000000', family='Inter'),
@@ -504,18 +577,75 @@ def main():
             else:
                 st.info("⚠ Insufficient rating data for correlation analysis")
                 st.markdown('</div>', unsafe_allow_html=True)
+            
+            if config.HISTORY_ENABLED:
+                history = load_price_history()
+                
+                granularity = st.radio("Trend granularity", ['day', 'hour'], horizontal=True)
+                trend = history.query_trend(st.session_state.search_term, granularity)
+                if len({row['bucket_start'] for row in trend}) > 1:
+                    st.markdown('<div class="data-card">', unsafe_allow_html=True)
+                    st.markdown('<div class="section-header">PRICE TREND</div>', unsafe_allow_html=True)
+                    st.plotly_chart(create_price_trend_chart(trend, granularity), use_container_width=True)
+                    st.markdown('</div>', unsafe_allow_html=True)
+                else:
+                    st.info("⚠ Price trend appears once this query has been scraped in more than one period")
+                
+                titles = dict(zip(df['URL'].astype(str), df['TITLE'] + ' (' + df['SOURCE'] + ')'))
+                product_url = st.selectbox(
+                    "Listing price history",
+                    options=list(titles),
+                    format_func=lambda url: titles[url][:100]
+                )
+                product_trend = history.product_trend(product_url, granularity) if product_url else []
+                if len(product_trend) > 1:
+                    st.markdown('<div class="data-card">', unsafe_allow_html=True)
+                    st.plotly_chart(create_product_trend_chart(product_trend, granularity), use_container_width=True)
+                    st.markdown('</div>', unsafe_allow_html=True)
+                elif product_url:
+                    st.info("⚠ Listing trend appears once this listing has been seen in more than one period")
         
         with tab3:
+            from ranking import RankingWeights, rank_products
+            
+            with st.expander("Ranking weights"):
+                col_w1, col_w2, col_w3, col_w4 = st.columns(4)
+                with col_w1:
+                    weight_price = st.slider("Price", 0.0, 1.0, config.RANK_WEIGHT_PRICE, 0.05)
+                with col_w2:
+                    weight_rating = st.slider("Rating", 0.0, 1.0, config.RANK_WEIGHT_RATING, 0.05)
+                with col_w3:
+                    weight_sold = st.slider("Sold", 0.0, 1.0, config.RANK_WEIGHT_SOLD, 0.05)
+                with col_w4:
+                    weight_reviews = st.slider("Reviews", 0.0, 1.0, config.RANK_WEIGHT_REVIEWS, 0.05)
+            weights = RankingWeights(
+                price=weight_price, rating=weight_rating, sold=weight_sold, reviews=weight_reviews
+            )
+            
             st.markdown('<div class="data-card">', unsafe_allow_html=True)
-            st.plotly_chart(create_top_products_chart(df, n=10), use_container_width=True)
+            st.plotly_chart(create_top_products_chart(df, n=10, weights=weights), use_container_width=True)
             st.markdown('</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="section-header">RECOMMENDED SELECTIONS</div>', unsafe_allow_html=True)
-            recommended = df.nsmallest(5, 'PRICE')[['TITLE', 'PRICE', 'SOURCE', 'RATING', 'URL']].copy()
+            recommended = rank_products(df, k=5, weights=weights)[['TITLE', 'PRICE', 'SOURCE', 'RATING', 'URL', 'IMAGE']]
             
-            for idx, row in recommended.iterrows():
+            thumbnails = {}
+            if config.IMAGE_PIPELINE:
+                from services.image_service import ThumbnailCache, load_thumbnails
+                thumbnails = load_thumbnails(
+                    recommended['IMAGE'],
+                    ThumbnailCache(config.THUMBNAIL_CACHE_DIR, config.THUMBNAIL_CACHE_MAX_MB * 1024 * 1024)
+                )
+            
+            for row in recommended.to_dict('records'):
                 st.markdown('<div class="product-card">', unsafe_allow_html=True)
-                col1, col2, col3 = st.columns([3, 1, 1])
+                thumbnail = thumbnails.get(str(row['IMAGE'])) if pd.notna(row['IMAGE']) else None
+                if thumbnail:
+                    col_img, col1, col2, col3 = st.columns([1, 3, 1, 1])
+                    with col_img:
+                        st.image(thumbnail, use_container_width=True)
+                else:
+                    col1, col2, col3 = st.columns([3, 1, 1])
                 with col1:
                     st.markdown(f"**{row['TITLE'][:80]}...**")
                 with col2:
@@ -535,43 +665,60 @@ def main():
             st.markdown('<div class="data-card">', unsafe_allow_html=True)
             st.markdown('<div class="section-header">DATA REPOSITORY</div>', unsafe_allow_html=True)
             
+            if st.session_state.get('explorer_df_id') != id(df):
+                from explorer import ProductExplorer
+                st.session_state.explorer = ProductExplorer(df)
+                st.session_state.explorer_df_id = id(df)
+            explorer = st.session_state.explorer
+            
             col1, col2 = st.columns(2)
             with col1:
                 source_filter = st.multiselect(
                     "Filter by Marketplace:",
-                    options=df['SOURCE'].unique(),
-                    default=df['SOURCE'].unique()
+                    options=explorer.sources,
+                    default=explorer.sources
                 )
             with col2:
                 price_range = st.slider(
                     "Price Range Filter (USD):",
-                    min_value=float(df['PRICE'].min()),
-                    max_value=float(df['PRICE'].max()),
-                    value=(float(df['PRICE'].min()), float(df['PRICE'].max()))
+                    min_value=explorer.min_price,
+                    max_value=explorer.max_price,
+                    value=(explorer.min_price, explorer.max_price)
                 )
             
-            filtered_df = df[
-                (df['SOURCE'].isin(source_filter)) &
-                (df['PRICE'] >= price_range[0]) &
-                (df['PRICE'] <= price_range[1])
-            ]
+            filtered_count = explorer.count(source_filter, *price_range)
+            page_size = 50
+            page_count = max(1, -(-filtered_count // page_size))
+            
+            col_page, col_order = st.columns([1, 1])
+            with col_page:
+                page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+            with col_order:
+                descending = st.toggle("Highest price first", value=False)
             
+            page_df = explorer.page(source_filter, *price_range, page=page - 1, page_size=page_size, descending=descending)
             st.dataframe(
-                filtered_df[['SOURCE', 'TITLE', 'PRICE', 'RATING', 'URL']],
+                page_df[['SOURCE', 'TITLE', 'PRICE', 'RATING', 'URL']],
                 use_container_width=True,
                 height=400
             )
             
-            st.markdown(f"**Records Displayed:** {len(filtered_df):,} of {len(df):,}")
-            
-            csv = filtered_df.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="EXPORT TO CSV",
-                data=csv,
-                file_name=f"{replace_spaces(st.session_state.search_term)}_analysis_{datetime.now().strftime('%Y%m%d')}.csv",
-                mime="text/csv",
-                use_container_width=True
+            first_row = (page - 1) * page_size + 1 if len(page_df) else 0
+            last_row = first_row + len(page_df) - 1 if len(page_df) else 0
+            st.markdown(
+                f"**Records Displayed:** {first_row:,}–{last_row:,} "
+                f"of {filtered_count:,} matching ({len(explorer):,} total)"
             )
+            
+            if st.button("PREPARE CSV EXPORT", use_container_width=True):
+                csv = explorer.filtered(source_filter, *price_range, descending=descending).to_csv(index=False).encode('utf-8')
+                st.download_button(
+                    label="EXPORT TO CSV",
+                    data=csv,
+                    file_name=f"{replace_spaces(st.session_state.search_term)}_analysis_{datetime.now().strftime('%Y%m%d')}.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
             st.markdown('</div>', unsafe_allow_html=True)
     
     else:
@@ -0,0 +1,190 @@
+from services.basic_service import ParserClass
+from services.latency import latency_report, remaining
+from services.scheduler import Lane
+from schema import ProductSchema
+from logger import get_logger
+from profiling import profile_query
+from query_normalization import get_query_planner
+from config import get_config
+
+import asyncio
+import time
+
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from services.catalog_index import CatalogIndex
+    from services.price_history import PriceHistory
+    from services.work_queue import WorkQueue
+
+class MainParser:
+    def __init__(self, work_queue: Optional["WorkQueue"] = None, catalog: Optional["CatalogIndex"] = None,
+                 lane: Lane = Lane.INTERACTIVE, history: Optional["PriceHistory"] = None):
+        from services.amazon_service import AmazonService
+        from services.ebay_service import EbayService
+
+        self.ebay_parser: ParserClass = EbayService()
+        self.amazon_parser: ParserClass = AmazonService()
+        self.work_queue: Optional["WorkQueue"] = work_queue
+        self.catalog: Optional["CatalogIndex"] = catalog
+        self.lane: Lane = lane
+        self.history: Optional["PriceHistory"] = history
+        self.logger = get_logger("main-parser")
+    
+    async def distributed_parse(self, prompt: str, timeout: float = 60.0) -> List[ProductSchema]:
+        self.logger.info("Submitting '%s' to the work queue", prompt)
+        job_ids = self.work_queue.submit(prompt, lane=self.lane)
+        results = await self.work_queue.wait(job_ids, timeout=timeout)
+        merged_products = [product for job_id in job_ids for product in results.get(job_id, [])]
+        self.logger.info("Distributed parsing complete - Total: %d", len(merged_products))
+        return merged_products
+    
+    async def merge_parse(self, prompt: str, deadline_seconds: Optional[float] = None) -> List[ProductSchema]:
+        with profile_query(prompt, "ALL"):
+            products, _ = await self._merge_parse(prompt, deadline_seconds)
+            return products
+    
+    async def _merge_parse(self, prompt: str, deadline_seconds: Optional[float]) -> Tuple[List[ProductSchema], bool]:
+        """Products from every source that answered, and whether all of them finished in time."""
+        self.logger.info("Starting concurrent parsing for: '%s'", prompt)
+        
+        if deadline_seconds is None:
+            deadline_seconds = get_config().SEARCH_DEADLINE_SECONDS
+        deadline = time.monotonic() + deadline_seconds
+        
+        try:
+            if self.work_queue is not None:
+                return await self.distributed_parse(prompt, timeout=deadline_seconds), True
+            
+            ebay_task = asyncio.ensure_future(self.ebay_parser.parse(prompt, deadline=deadline, lane=self.lane))
+            amazon_task = asyncio.ensure_future(self.amazon_parser.parse(prompt, deadline=deadline, lane=self.lane))
+            
+            _, pending = await asyncio.wait([ebay_task, amazon_task], timeout=remaining(deadline))
+            for task in pending:
+                task.cancel()
+            
+            ebay_products = self._task_result(ebay_task, "eBay")
+            amazon_products = self._task_result(amazon_task, "Amazon")
+            complete: bool = ebay_products is not None and amazon_products is not None
+            
+            merged_products = (ebay_products or []) + (amazon_products or [])
+            
+            self.logger.info(
+                "Parsing complete - eBay: %d, Amazon: %d, Total: %d%s",
+                len(ebay_products or []), len(amazon_products or []), len(merged_products),
+                " (partial, deadline expired)" if pending else ""
+            )
+            for source, stats in latency_report().items():
+                if stats["samples"]:
+                    self.logger.info(
+                        "%s latency - p50: %.2fs, p99: %.2fs, hedges: %d (%d won)",
+                        source, stats['p50'], stats['p99'], stats['hedges'], stats['hedge_wins']
+                    )
+            
+            return merged_products, complete
+        
+        except Exception as e:
+            self.logger.error("Error in merge_parse: %s", e)
+            return [], False
+    
+    def _task_result(self, task: asyncio.Future, name: str) -> Optional[List[ProductSchema]]:
+        if not task.done() or task.cancelled():
+            self.logger.warning("%s parsing did not finish before the deadline", name)
+            return None
+        if task.exception() is not None:
+            self.logger.error("%s parsing failed: %s", name, task.exception())
+            return None
+        return task.result()
+    
+    async def _parse_and_close(self, prompt: str, deadline_seconds: Optional[float] = None) -> List[ProductSchema]:
+        from services.transport import get_transport
+
+        try:
+            return await self.merge_parse(prompt, deadline_seconds)
+        finally:
+            await get_transport().close()
+    
+    def parse(self, prompt: str, deadline_seconds: Optional[float] = None) -> List[ProductSchema]:
+        return asyncio.run(self._parse_and_close(prompt, deadline_seconds))
+    
+    def search(self, prompt: str, refresh: bool = False) -> List[ProductSchema]:
+        if self.catalog is not None and not refresh and self.catalog.is_fresh(prompt):
+            products = self.catalog.search(prompt, max_age_seconds=self.catalog.max_age_seconds)
+            if products:
+                self.logger.info("Served %d products for '%s' from the catalog index", len(products), prompt)
+                return products
+        
+        products = self.parse(prompt)
+        if products:
+            self._store(products, prompt)
+        return products
+    
+    async def _batch_parse(self, prompt: str, slots: asyncio.Semaphore) -> Optional[List[ProductSchema]]:
+        # The deadline starts once the query holds a slot, not while it queues behind the rest of the batch
+        async with slots:
+            with profile_query(prompt, "ALL"):
+                products, complete = await self._merge_parse(prompt, None)
+        return products if complete else None
+    
+    async def _parse_many_and_close(self, prompts: List[str]) -> Dict[str, Optional[List[ProductSchema]]]:
+        from services.transport import get_transport
+
+        config = get_config()
+        # One fetch per source per query: run no more queries than the batch lane can admit at once
+        slots = asyncio.Semaphore(max(1, config.SCHEDULER_MAX_CONCURRENCY - config.SCHEDULER_RESERVED_INTERACTIVE))
+        try:
+            results = await asyncio.gather(*(self._batch_parse(prompt, slots) for prompt in prompts))
+            return dict(zip(prompts, results))
+        finally:
+            await get_transport().close()
+    
+    def _store(self, products: List[ProductSchema], prompt: str):
+        if self.catalog is not None:
+            self.catalog.add_products(products, query=prompt)
+        if self.history is not None:
+            self.history.record(products, query=prompt)
+    
+    def search_many(self, prompts: List[str], refresh: bool = False) -> Dict[str, Optional[List[ProductSchema]]]:
+        """
+        Search a batch of queries, sharing one scrape between related ones.
+        A query whose sources did not all finish before the deadline maps to
+        None (failed) rather than an empty list; nothing is stored for it.
+        """
+        planner = get_query_planner()
+        if self.catalog is not None:
+            # Result sets from earlier runs, so overlap is known before this batch scrapes anything
+            for key, urls in self.catalog.result_urls(prompts).items():
+                planner.observe(key, urls)
+        plan: Dict[str, str] = planner.plan(prompts)
+        representatives: List[str] = list(dict.fromkeys(plan.values()))
+        results: Dict[str, Optional[List[ProductSchema]]] = {}
+        
+        live: List[str] = []
+        for prompt in representatives:
+            if self.catalog is not None and not refresh and self.catalog.is_fresh(prompt):
+                products = self.catalog.search(prompt, max_age_seconds=self.catalog.max_age_seconds)
+                if products:
+                    results[prompt] = products
+                    continue
+            live.append(prompt)
+        
+        if live:
+            for prompt, products in asyncio.run(self._parse_many_and_close(live)).items():
+                results[prompt] = products
+                if products:
+                    planner.observe(prompt, (str(product.product_url) for product in products))
+                    self._store(products, prompt)
+        
+        # Shared results are returned but only ever stored under the representative's own query key
+        shared: int = sum(1 for prompt, representative in plan.items() if prompt != representative)
+        failed: List[str] = [prompt for prompt in prompts if results[plan[prompt]] is None]
+        
+        self.logger.info(
+            "Batch of %d queries - scraped %d, %d from the catalog index, %d shared with a related query",
+            len(plan), len(live), len(representatives) - len(live), shared
+        )
+        if failed:
+            self.logger.error(
+                "%d of %d queries did not finish before the deadline: %s", len(failed), len(plan), ", ".join(failed)
+            )
+        return {prompt: results[plan[prompt]] for prompt in prompts}
@@ -0,0 +1,137 @@
+import argparse
+import asyncio
+import random
+
+from aiohttp import web
+from collections import Counter
+from pydantic import BaseModel
+
+class FaultProfile(BaseModel):
+    items_per_page: int = 48
+    latency_ms: float = 150.0
+    latency_jitter_ms: float = 100.0
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout_seconds: float = 60.0
+    slow_drip_rate: float = 0.0
+    slow_drip_chunk_bytes: int = 2048
+    slow_drip_delay_ms: float = 50.0
+
+def amazon_page(query: str, count: int, rng: random.Random) -> str:
+    boxes = []
+    for i in range(count):
+        asin = f"B{rng.randrange(10 ** 8, 10 ** 9)}X"
+        price = rng.uniform(5, 1500)
+        boxes.append(f"""
+        <div data-component-type="s-search-result" data-asin="{asin}" class="s-result-item">
+          <div class="a-section">
+            <img class="s-image" src="https://m.media-amazon.com/images/I/{asin}.jpg"/>
+            <h2 class="a-size-medium"><a class="a-link-normal" href="/dp/{asin}"><span>{query} model {i} - synthetic listing</span></a></h2>
+            <span class="a-icon-alt">{rng.uniform(2.5, 5):.1f} out of 5 stars</span>
+            <span class="a-price"><span class="a-price-whole">{int(price):,}.</span><span class="a-price-fraction">{int(price * 100) % 100:02d}</span></span>
+            <span class="a-size-base a-color-secondary">{rng.randint(1, 20)}K+ bought in past month</span>
+          </div>
+        </div>""")
+    return f"<html><head><meta charset='utf-8'></head><body><div class='s-main-slot'>{''.join(boxes)}</div></body></html>"
+
+def ebay_page(query: str, count: int, rng: random.Random) -> str:
+    cards = []
+    for i in range(count):
+        item_id = rng.randrange(10 ** 11, 10 ** 12)
+        stars = "".join(
+            f'<svg class="icon icon--16 {"star-filled" if s < rng.randint(1, 5) else "star-empty"}"></svg>'
+            for s in range(5)
+        )
+        cards.append(f"""
+        <div class="su-card-container">
+          <a class="s-card__link" href="https://www.ebay.com/itm/{item_id}">
+            <img class="s-card__image" src="https://i.ebayimg.com/images/g/{item_id}/s-l500.jpg"/>
+            <span class="su-styled-text primary default">{query} listing {i} - synthetic</span>
+          </a>
+          <span class="su-styled-text primary bold large-1 s-card__price">${rng.uniform(5, 1500):,.2f}</span>
+          <div class="x-star-rating">{stars}</div>
+          <span class="s-card__reviews-count">({rng.randint(0, 5000)} product ratings)</span>
+        </div>""")
+    return f"<html><head><meta charset='utf-8'></head><body><ul class='srp-results'>{''.join(cards)}</ul></body></html>"
+
+
+class MockMarketplace:
+    """
+    Local stand-in for the Amazon and eBay search pages, with injected
+    latency, 503s, hung requests and slow-drip bodies.
+
+    Routes: /amazon/s?k=<query>, /ebay/sch/i.html?_nkw=<query>, /stats.
+    """
+
+    def __init__(self, profile: FaultProfile, seed: int = 0):
+        self.profile: FaultProfile = profile
+        self.rng: random.Random = random.Random(seed)
+        self.stats: Counter = Counter()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/amazon/s", self.amazon)
+        app.router.add_get("/ebay/sch/i.html", self.ebay)
+        app.router.add_get("/stats", self.get_stats)
+        return app
+
+    async def _respond(self, request: web.Request, marketplace: str, html: str) -> web.StreamResponse:
+        profile = self.profile
+        self.stats[f"{marketplace}.requests"] += 1
+        await asyncio.sleep(max(0.0, profile.latency_ms + self.rng.uniform(-1, 1) * profile.latency_jitter_ms) / 1000)
+
+        roll: float = self.rng.random()
+        if roll < profile.error_rate:
+            self.stats[f"{marketplace}.503"] += 1
+            return web.Response(status=503, text="Service Unavailable")
+        roll -= profile.error_rate
+        if roll < profile.timeout_rate:
+            self.stats[f"{marketplace}.timeout"] += 1
+            await asyncio.sleep(profile.timeout_seconds)
+            return web.Response(status=504, text="Gateway Timeout")
+        roll -= profile.timeout_rate
+
+        body: bytes = html.encode("utf-8")
+        if roll < profile.slow_drip_rate:
+            self.stats[f"{marketplace}.slow_drip"] += 1
+            response = web.StreamResponse(status=200, headers={"Content-Type": "text/html; charset=utf-8"})
+            await response.prepare(request)
+            for start in range(0, len(body), profile.slow_drip_chunk_bytes):
+                await response.write(body[start:start + profile.slow_drip_chunk_bytes])
+                await asyncio.sleep(profile.slow_drip_delay_ms / 1000)
+            await response.write_eof()
+            return response
+
+        self.stats[f"{marketplace}.ok"] += 1
+        return web.Response(body=body, content_type="text/html", charset="utf-8")
+
+    async def amazon(self, request: web.Request) -> web.StreamResponse:
+        query: str = request.query.get("k", "product")
+        return await self._respond(request, "amazon", amazon_page(query, self.profile.items_per_page, self.rng))
+
+    async def ebay(self, request: web.Request) -> web.StreamResponse:
+        query: str = request.query.get("_nkw", "product")
+        return await self._respond(request, "ebay", ebay_page(query, self.profile.items_per_page, self.rng))
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.stats))
+
+def run_server(profile: FaultProfile, host: str = "127.0.0.1", port: int = 8080, seed: int = 0):
+    # Created here, not at import: a forked server must start its own log writer thread
+    from logger import get_logger
+
+    logger = get_logger("mock-marketplace")
+    logger.info("Mock marketplace on http://%s:%s - %s", host, port, profile.model_dump())
+    web.run_app(MockMarketplace(profile, seed).app(), host=host, port=port, print=None)
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Serve synthetic Amazon/eBay search pages with fault injection")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8080)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    for name, field in FaultProfile.model_fields.items():
+        arg_parser.add_argument(f"--{name.replace('_', '-')}", type=type(field.default), default=field.default)
+    args = vars(arg_parser.parse_args())
+
+    host, port, seed = args.pop("host"), args.pop("port"), args.pop("seed")
+    run_server(FaultProfile(**args), host, port, seed)
@@ -0,0 +1,166 @@
+from logger import get_logger
+
+import os
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging import Logger
+from types import FrameType
+from typing import Dict, Iterator, Optional
+
+logger: Logger = get_logger("profiling")
+
+_sampled: ContextVar[Optional[bool]] = ContextVar("profiling_sampled", default=None)
+_sampler: ContextVar[Optional["StackSampler"]] = ContextVar("profiling_sampler", default=None)
+_tracemalloc_users: int = 0
+_tracemalloc_lock: threading.Lock = threading.Lock()
+
+
+class StackSampler(threading.Thread):
+    """
+    Statistical profiler: a daemon thread that snapshots one target thread's
+    Python stack every `interval` seconds and counts collapsed stacks. The
+    output is the `frame;frame;frame count` format read by flamegraph.pl,
+    speedscope and inferno.
+    """
+
+    def __init__(self, target_thread_id: int, interval: float = 0.005):
+        super().__init__(daemon=True, name="stack-sampler")
+        self.target_thread_id: int = target_thread_id
+        self.interval: float = interval
+        self.stacks: Counter = Counter()
+        self.samples: int = 0
+        self.sections: Dict[str, str] = {}
+        self._stop_event: threading.Event = threading.Event()
+
+    @staticmethod
+    def _collapse(frame: Optional[FrameType]) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is not None:
+                self.stacks[self._collapse(frame)] += 1
+                self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def write_folded(self, path: str, marker: Optional[str] = None):
+        """Write the collapsed stacks, or only those passing through the `marker` frame."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                if marker is None or marker in stack.split(";"):
+                    f.write(f"{stack} {count}\n")
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:40] or "query"
+
+def _start_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        _tracemalloc_users += 1
+
+def _stop_tracemalloc(path: str, top: int = 25):
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    if snapshot is None:
+        return
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__)
+    ])
+    with open(path, "w", encoding="utf-8") as f:
+        for stat in snapshot.statistics("traceback")[:top]:
+            f.write(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+            for line in stat.traceback.format():
+                f.write(f"{line}\n")
+            f.write("\n")
+
+@contextmanager
+def profile_query(query: str, source: str) -> Iterator[bool]:
+    """
+    Profile the enclosed block for a sampled fraction of queries.
+
+    The sampling decision is made by the outermost block and inherited by
+    nested blocks (including tasks spawned inside it). Only the outermost
+    block samples the thread; each nested block gets its own folded file
+    holding just the stacks that pass through the function that opened it,
+    so per-source profiles are not mixed with the other services' frames.
+    Yields whether this block is being profiled.
+    """
+    from config import get_config
+
+    config = get_config()
+    parent: Optional[bool] = _sampled.get()
+    sampled: bool = parent if parent is not None else (
+        config.PROFILE_SAMPLE_RATE > 0 and random.random() < config.PROFILE_SAMPLE_RATE
+    )
+
+    active: Optional[StackSampler] = _sampler.get()
+    if sampled and active is not None:
+        # Caller of the `with` statement: profile_query -> __enter__ -> caller
+        caller = sys._getframe(2).f_code
+        active.sections[source] = f"{caller.co_name} ({os.path.basename(caller.co_filename)}:{caller.co_firstlineno})"
+        yield True
+        return
+
+    token = _sampled.set(sampled)
+    if not sampled:
+        try:
+            yield False
+        finally:
+            _sampled.reset(token)
+        return
+
+    os.makedirs(config.PROFILE_DIR, exist_ok=True)
+    base: str = os.path.join(
+        config.PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{_slug(query)}_{os.getpid()}"
+    )
+    sampler = StackSampler(threading.get_ident(), config.PROFILE_INTERVAL_MS / 1000)
+    sampler_token = _sampler.set(sampler)
+    if config.PROFILE_TRACEMALLOC:
+        _start_tracemalloc()
+    started: float = time.perf_counter()
+    sampler.start()
+    try:
+        yield True
+    finally:
+        sampler.stop()
+        elapsed: float = time.perf_counter() - started
+        _sampler.reset(sampler_token)
+        _sampled.reset(token)
+        try:
+            if config.PROFILE_TRACEMALLOC:
+                _stop_tracemalloc(f"{base}_{source.lower()}.alloc.txt")
+            sampler.write_folded(f"{base}_{source.lower()}.folded")
+            for section, marker in sampler.sections.items():
+                sampler.write_folded(f"{base}_{section.lower()}.folded", marker)
+            logger.info(
+                "Profiled '%s' [%s] - %.2fs, %d samples -> %s_%s.folded (%d per-source)",
+                query, source, elapsed, sampler.samples, base, source.lower(), len(sampler.sections)
+            )
+        except OSError as e:
+            logger.error("Failed to write profile for '%s' [%s]: %s", query, source, e)
@@ -0,0 +1,120 @@
+import re
+import threading
+import unicodedata
+
+from pydantic import BaseModel
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+from urllib.parse import quote_plus
+
+STOP_WORDS: FrozenSet[str] = frozenset({"a", "an", "and", "by", "for", "in", "of", "on", "the", "to", "with"})
+
+_JOINING_PLUS = re.compile(r"(?<=\w)\+(?=\w)")
+_UNSAFE = re.compile(r"[^\w\s+#&.'-]")
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN = re.compile(r"[\w+#&.'-]+")
+
+class CanonicalQuery(BaseModel):
+    text: str
+    tokens: List[str]
+    key: str
+
+def _strip_accents(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+def canonicalize(query: str) -> CanonicalQuery:
+    """
+    Canonical form of a search query.
+
+    `text` is what gets sent to the marketplaces: Unicode NFKC, case-folded,
+    accents removed, '+' used as a word joiner turned back into a space,
+    stray punctuation dropped and whitespace collapsed. `tokens` and `key`
+    additionally drop stop words and are what caching, deduplication and
+    scheduling compare, so "iPhone 15", "iphone  15" and "IPHONE+15" share
+    one key.
+    """
+    if not query or not query.strip():
+        raise ValueError("Input prompt cannot be empty")
+
+    text = unicodedata.normalize("NFKC", query)
+    text = _strip_accents(text).casefold()
+    text = _JOINING_PLUS.sub(" ", text)
+    text = _UNSAFE.sub(" ", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    if not text:
+        text = _WHITESPACE.sub(" ", query).strip().casefold()
+
+    words = [token.strip(".'-") for token in _TOKEN.findall(text)]
+    words = [word for word in words if word]
+    tokens = [word for word in words if word not in STOP_WORDS] or words
+    return CanonicalQuery(text=text, tokens=tokens, key=" ".join(tokens))
+
+def query_key(query: str) -> str:
+    return canonicalize(query).key
+
+def encode_query(query: str) -> str:
+    """URL-encode the canonical query text for a marketplace search URL."""
+    return quote_plus(canonicalize(query).text)
+
+def _jaccard(a: FrozenSet, b: FrozenSet) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class QueryPlanner:
+    """
+    Groups the queries of a batch so related ones share a single scrape.
+
+    Two queries share when they have the same canonical key, or when their
+    previously observed result URL sets overlap by at least `result_overlap`
+    (Jaccard). Similar wording alone is not enough: "iphone 15 pro max" and
+    "iphone 15 pro max case" want different products. Observations
+    accumulate across batches through `observe()`; `MainParser.search_many`
+    also replays the result sets stored in the catalog index, so they
+    outlive the process.
+    """
+
+    def __init__(self, result_overlap: float = 0.7):
+        self.result_overlap: float = result_overlap
+        self.observed: Dict[str, FrozenSet[str]] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def observe(self, query: str, product_urls: Iterable[str]):
+        urls = frozenset(product_urls)
+        if urls:
+            with self._lock:
+                self.observed[query_key(query)] = urls
+
+    def _related(self, key: str, rep_key: str) -> bool:
+        if key == rep_key:
+            return True
+        with self._lock:
+            seen, rep_seen = self.observed.get(key), self.observed.get(rep_key)
+        return seen is not None and rep_seen is not None and _jaccard(seen, rep_seen) >= self.result_overlap
+
+    def plan(self, queries: Iterable[str]) -> Dict[str, str]:
+        """Map every input query to the representative query whose scrape it reuses."""
+        plan: Dict[str, str] = {}
+        representatives: List[Tuple[str, str]] = []
+        for query in queries:
+            key: str = query_key(query)
+            representative: Optional[str] = None
+            for rep_query, rep_key in representatives:
+                if self._related(key, rep_key):
+                    representative = rep_query
+                    break
+            if representative is None:
+                representatives.append((query, key))
+                representative = query
+            plan[query] = representative
+        return plan
+
+
+_planner: Optional[QueryPlanner] = None
+
+def get_query_planner() -> QueryPlanner:
+    global _planner
+    if _planner is None:
+        _planner = QueryPlanner()
+    return _planner
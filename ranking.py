@@ -0,0 +1,105 @@
+import numpy as np
+
+from pydantic import BaseModel
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+class RankingWeights(BaseModel):
+    price: float = 0.4
+    rating: float = 0.3
+    sold: float = 0.2
+    reviews: float = 0.1
+
+def _as_float(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+def _log_scale(values: np.ndarray) -> np.ndarray:
+    logged = np.log1p(np.clip(values, 0, None))
+    top = np.nanmax(logged) if np.isfinite(logged).any() else 0.0
+    return logged / top if top > 0 else np.zeros_like(logged)
+
+def outlier_mask(price: np.ndarray, threshold: float = 3.5) -> np.ndarray:
+    """
+    True for rows worth ranking: a positive price whose modified z-score
+    (median/MAD on log price) is within `threshold`. This drops $0.00 parse
+    failures and listings priced far outside the bulk of the result set,
+    such as cheap accessories in a phone search.
+    """
+    price = _as_float(price)
+    valid = np.isfinite(price) & (price > 0)
+    if valid.sum() < 3:
+        return valid
+
+    logged = np.log(np.where(valid, price, 1.0))
+    median = np.median(logged[valid])
+    mad = np.median(np.abs(logged[valid] - median))
+    if mad == 0:
+        return valid
+    z = 0.6745 * (logged - median) / mad
+    return valid & (np.abs(z) <= threshold)
+
+def value_scores(price, rating, sold, reviews, weights: Optional[RankingWeights] = None) -> np.ndarray:
+    """
+    Composite value score in [0, 1]: cheaper, better rated, more sold and
+    more reviewed is better. Each row's score is the weighted mean of the
+    components it actually has, so a marketplace that never reports sold
+    counts is not penalised for it.
+    """
+    weights = weights or RankingWeights()
+    price, rating, sold, reviews = (_as_float(x) for x in (price, rating, sold, reviews))
+
+    positive = np.isfinite(price) & (price > 0)
+    logged = np.log(np.where(positive, price, 1.0))
+    if positive.any():
+        low, high = np.percentile(logged[positive], [5, 95])
+    else:
+        low, high = 0.0, 0.0
+    spread = high - low if high > low else 1.0
+    price_score = 1.0 - np.clip((logged - low) / spread, 0.0, 1.0)
+
+    components = np.stack([
+        np.where(positive, price_score, np.nan),
+        np.clip(rating / 5.0, 0.0, 1.0),
+        _log_scale(sold),
+        _log_scale(reviews)
+    ])
+    component_weights = np.array([weights.price, weights.rating, weights.sold, weights.reviews])[:, None]
+
+    present = np.isfinite(components)
+    weighted = np.where(present, components * component_weights, 0.0).sum(axis=0)
+    total = np.where(present, component_weights, 0.0).sum(axis=0)
+    return np.divide(weighted, total, out=np.zeros_like(weighted), where=total > 0)
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, in O(n + k log k)."""
+    scores = _as_float(scores)
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= scores.size:
+        return np.argsort(-scores, kind="stable")
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+def rank_products(df: "pd.DataFrame", k: int = 10, weights: Optional[RankingWeights] = None,
+                  outlier_threshold: float = 3.5) -> "pd.DataFrame":
+    import pandas as pd
+
+    if df.empty:
+        return df.assign(SCORE=pd.Series(dtype=float))
+
+    columns = {
+        name: pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64)
+        for name in ("PRICE", "RATING", "SOLD_OUT", "VIEWS")
+    }
+    keep = outlier_mask(columns["PRICE"], outlier_threshold)
+    candidates = np.flatnonzero(keep)
+    scores = value_scores(
+        columns["PRICE"][candidates], columns["RATING"][candidates],
+        columns["SOLD_OUT"][candidates], columns["VIEWS"][candidates], weights
+    )
+    order = top_k(scores, k)
+    ranked = df.iloc[candidates[order]].copy()
+    ranked["SCORE"] = scores[order].round(4)
+    return ranked
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, HttpUrl
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Iterable, List, Optional
 
 class ParserSource(Enum):
     EBAY = "EBAY"
@@ -17,4 +17,36 @@ class ProductSchema(BaseModel):
     product_views: Optional[int] = None
     product_image: Optional[HttpUrl] = None
     product_url: HttpUrl
-    product_parsed_date: datetime
\ No newline at end of file
+    product_parsed_date: datetime
+
+    @classmethod
+    def encode_many(cls, products: Iterable["ProductSchema"]) -> bytes:
+        from serialization import encode_products
+        return encode_products(products)
+
+    @classmethod
+    def decode_many(cls, data: bytes, validate: bool = False) -> List["ProductSchema"]:
+        from serialization import decode_products
+        return decode_products(data, validate=validate)
+
+class Lane(Enum):
+    INTERACTIVE = "INTERACTIVE"
+    BATCH = "BATCH"
+
+class JobStatus(Enum):
+    PENDING = "PENDING"
+    LEASED = "LEASED"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+class WorkJob(BaseModel):
+    job_id: str
+    query: str
+    source: ParserSource
+    lane: Lane = Lane.BATCH
+    status: JobStatus = JobStatus.PENDING
+    attempts: int = 0
+    lease_token: Optional[str] = None
+    lease_expires: Optional[float] = None
+    worker_id: Optional[str] = None
+    last_error: Optional[str] = None
\ No newline at end of file
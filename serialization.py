@@ -0,0 +1,90 @@
+from schema import ProductSchema, ParserSource
+
+import json
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+SCHEMA_VERSION: int = 1
+MAGIC: bytes = b"PS"
+CODEC_MSGPACK: int = 1
+CODEC_JSON: int = 2
+
+COLUMNS: List[str] = [
+    "product_id", "parsed_source", "product_title", "product_price", "product_rating",
+    "product_sold_out", "product_views", "product_image", "product_url", "product_parsed_date"
+]
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+def _to_columns(products: List[ProductSchema]) -> Dict[str, List[Any]]:
+    return {
+        "product_id": [p.product_id for p in products],
+        "parsed_source": [p.parsed_source.value for p in products],
+        "product_title": [p.product_title for p in products],
+        "product_price": [p.product_price for p in products],
+        "product_rating": [p.product_rating for p in products],
+        "product_sold_out": [p.product_sold_out for p in products],
+        "product_views": [p.product_views for p in products],
+        "product_image": [str(p.product_image) if p.product_image is not None else None for p in products],
+        "product_url": [str(p.product_url) for p in products],
+        "product_parsed_date": [p.product_parsed_date.isoformat() for p in products]
+    }
+
+def encode_products(products: Iterable[ProductSchema]) -> bytes:
+    """
+    Encode a product batch as a versioned, column-oriented payload.
+
+    Layout: b"PS" + schema version byte + codec byte + body, where the body
+    maps each field name to a list with one value per product.
+    """
+    products = list(products)
+    body: Dict[str, Any] = {"n": len(products), "columns": _to_columns(products)}
+
+    if msgpack is not None:
+        return MAGIC + bytes([SCHEMA_VERSION, CODEC_MSGPACK]) + msgpack.packb(body, use_bin_type=True)
+    return MAGIC + bytes([SCHEMA_VERSION, CODEC_JSON]) + json.dumps(body, separators=(",", ":")).encode("utf-8")
+
+def decode_products(data: bytes, validate: bool = False) -> List[ProductSchema]:
+    """
+    Decode a payload produced by encode_products.
+
+    By default the batch is treated as trusted internal data (such as work
+    queue results written by our own workers) and rebuilt with
+    model_construct, skipping validation; URL fields are then plain strings,
+    so dump them with `warnings=False`. Pass validate=True for payloads that
+    did not come from this codebase.
+    """
+    if len(data) < 4 or data[:2] != MAGIC:
+        raise ValueError("Not a product batch payload")
+
+    version, codec = data[2], data[3]
+    if version != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported product batch schema version: {version}")
+
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise ImportError("Decoding this payload requires the 'msgpack' package: pip install msgpack")
+        body: Dict[str, Any] = msgpack.unpackb(data[4:], raw=False)
+    elif codec == CODEC_JSON:
+        body = json.loads(data[4:].decode("utf-8"))
+    else:
+        raise ValueError(f"Unknown product batch codec: {codec}")
+
+    columns: Dict[str, List[Any]] = body["columns"]
+    sources: Dict[str, ParserSource] = {source.value: source for source in ParserSource}
+    products: List[ProductSchema] = []
+
+    for row in zip(*(columns[name] for name in COLUMNS)):
+        values: Dict[str, Optional[Any]] = dict(zip(COLUMNS, row))
+        if validate:
+            products.append(ProductSchema.model_validate(values))
+            continue
+        values["parsed_source"] = sources[values["parsed_source"]]
+        values["product_parsed_date"] = datetime.fromisoformat(values["product_parsed_date"])
+        products.append(ProductSchema.model_construct(**values))
+
+    return products
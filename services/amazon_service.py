@@ -1,29 +1,33 @@
-from config import Config
+from config import get_config
 from logger import get_logger
+from profiling import profile_query
+from query_normalization import encode_query
 from schema import ProductSchema, ParserSource
 from services.basic_service import ParserClass
+from services.selector_health import SelectorHealth, get_selector_health
+from services.transport import FetchError, FetchResult, Transport, get_transport
+from services.latency import LatencyTracker, get_latency_tracker, hedged_fetch, remaining
+from services.scheduler import AdmissionScheduler, Lane, get_scheduler
 
 import asyncio
-import aiohttp
 import random
 import uuid
 
-from bs4 import BeautifulSoup
 from logging import Logger
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, TYPE_CHECKING
 from datetime import datetime
 
-config: Config = Config()
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 class AmazonService(ParserClass):
     def __init__(self):
         super().__init__()
-        self.base_url: str = config.AMAZON_URL
+        self.base_url: str = get_config().AMAZON_URL
         self.headers: Dict[str, str] = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.9",
-            "Accept-Encoding": "gzip, deflate, br",
             "Connection": "keep-alive",
             "Upgrade-Insecure-Requests": "1",
             "Sec-Fetch-Dest": "document",
@@ -36,94 +40,92 @@ class AmazonService(ParserClass):
         self.logger: Logger = get_logger("amazon-service")
         self.products: List[ProductSchema] = []
         self.proxy: Optional[str] = None
+        self.transport: Transport = get_transport()
+        self.latency: LatencyTracker = get_latency_tracker(ParserSource.AMAZON.value)
+        self.scheduler: AdmissionScheduler = get_scheduler(ParserSource.AMAZON.value)
+        self.selector_health: SelectorHealth = get_selector_health(ParserSource.AMAZON.value)
+        self.title_selectors = self.selector_health.chain("title", [
+            "h2.a-size-medium span",
+            "h2 span.a-text-normal",
+            "h2 a span"
+        ])
+        self.url_selectors = self.selector_health.chain("url", [
+            "h2 a.a-link-normal",
+            "a.a-link-normal.s-no-outline",
+            "a.a-link-normal.s-line-clamp-2"
+        ])
     
     def set_proxy(self, proxy: str):
         self.proxy = proxy
-        self.logger.info(f"Proxy set: {proxy}")
+        self.logger.info("Proxy set: %s", proxy)
     
-    def _save_html_debug(self, html_content: str, filename: str = "amazon_debug.html"):
+    def _save_html_debug(self, html_content: bytes, filename: str = "amazon_debug.html"):
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
+            with open(filename, 'wb') as f:
                 f.write(html_content)
-            self.logger.info(f"HTML content saved to {filename} for debugging")
+            self.logger.info("HTML content saved to %s for debugging", filename)
         except Exception as e:
-            self.logger.error(f"Failed to save debug HTML: {e}")
+            self.logger.error("Failed to save debug HTML: %s", e)
     
-    async def _async_request(self, product_name: str, timeout: int = 10) -> Optional[str]:
+    async def _async_request(self, product_name: str, timeout: int = 10, deadline: Optional[float] = None,
+                             lane: Lane = Lane.INTERACTIVE, raise_errors: bool = False) -> Optional[FetchResult]:
         if not product_name:
             self.logger.error("Input product_name can't be empty")
             return None
         
-        await asyncio.sleep(random.uniform(1, 3))
+        config = get_config()
+        delay = random.uniform(config.AMAZON_MIN_DELAY_SECONDS, config.AMAZON_MAX_DELAY_SECONDS)
+        left = remaining(deadline)
+        if left is not None:
+            delay = min(delay, left / 4)
+        await asyncio.sleep(delay)
         
-        url = f"{self.base_url}{product_name.replace(' ', '+')}"
+        url = f"{self.base_url}{encode_query(product_name)}"
         
         try:
-            timeout_config = aiohttp.ClientTimeout(total=timeout)
-            connector = aiohttp.TCPConnector()
-            
-            async with aiohttp.ClientSession(timeout=timeout_config, connector=connector) as session:
-                request_kwargs = {
-                    "url": url,
-                    "headers": self.headers,
-                    "allow_redirects": True
-                }
-                
-                if self.proxy:
-                    request_kwargs["proxy"] = self.proxy
-                
-                async with session.get(**request_kwargs) as response:
-                    if response.status == 200:
-                        self.logger.info(f"Successfully connected to - {url}")
-                        return await response.text()
-                    elif response.status == 503:
-                        self.logger.error("Amazon blocked the request (503). Try using a proxy or reducing request frequency.")
-                        return None
-                    else:
-                        self.logger.error(f"Received status code {response.status} from {url}")
-                        return None
+            async with self.scheduler.admit(lane):
+                page = await hedged_fetch(
+                    self.transport, url, self.headers, timeout, self.latency,
+                    proxy=self.proxy, deadline=deadline
+                )
+            if page.status == 200:
+                self.logger.info("Successfully connected to - %s (%s)", url, page.http_version)
+                return page
+            elif page.status == 503:
+                error = ("Amazon blocked the request (503). Try using a proxy or reducing request frequency.",)
+            else:
+                error = ("Received status code %s from %s", page.status, url)
         
         except asyncio.TimeoutError:
-            self.logger.error(f"Request timed out for {url}")
-            return None
+            error = ("Request timed out for %s", url)
         except Exception as e:
-            self.logger.error(f"Unexpected error connecting to {url}: {e}")
-            return None
+            error = ("Unexpected error connecting to %s: %s", url, e)
+        
+        self.logger.error(*error)
+        if raise_errors:
+            raise FetchError(error[0] % error[1:])
+        return None
     
-    def _parse_product_box(self, box: BeautifulSoup) -> Optional[ProductSchema]:
+    def _parse_product_box(self, box: "BeautifulSoup") -> Optional[ProductSchema]:
         try:
             asin = box.get("data-asin")
             if not asin:
                 return None
             
-            title = "No title"
-            title_selectors = [
-                "h2.a-size-medium span",
-                "h2 span.a-text-normal",
-                "h2 a span"
-            ]
-            for selector in title_selectors:
-                title_tag = box.select_one(selector)
-                if title_tag:
-                    title = title_tag.text.strip()
-                    break
+            title_tag = self.title_selectors.select(box, lambda tag: bool(tag.text.strip()))
+            title_text = title_tag.text.strip() if title_tag else ""
+            self.selector_health.record("title", bool(title_text))
+            title = title_text or "No title"
             
             product_url = None
-            url_selectors = [
-                "h2 a.a-link-normal",
-                "a.a-link-normal.s-no-outline",
-                "a.a-link-normal.s-line-clamp-2"
-            ]
-            
-            for selector in url_selectors:
-                url_tag = box.select_one(selector)
-                if url_tag and url_tag.get('href'):
-                    href = url_tag['href']
-                    if href.startswith('/'):
-                        product_url = f"https://www.amazon.com{href}"
-                    elif href.startswith('http'):
-                        product_url = href
-                    break
+            url_tag = self.url_selectors.select(box, lambda tag: bool(tag.get('href')))
+            if url_tag:
+                href = url_tag['href']
+                if href.startswith('/'):
+                    product_url = f"https://www.amazon.com{href}"
+                elif href.startswith('http'):
+                    product_url = href
+            self.selector_health.record("url", product_url is not None)
             
             if not product_url:
                 product_url = f"https://www.amazon.com/dp/{asin}"
@@ -138,7 +140,8 @@ class AmazonService(ParserClass):
                     fraction = price_fraction_tag.text.strip()
                     price = float(f"{whole}.{fraction}")
                 except ValueError:
-                    self.logger.warning(f"Could not parse price for ASIN {asin}")
+                    self.logger.warning("Could not parse price for ASIN %s", asin)
+            self.selector_health.record("price", price > 0)
             
             rating = None
             rating_tag = box.select_one("span.a-icon-alt")
@@ -147,7 +150,7 @@ class AmazonService(ParserClass):
                     rating_text = rating_tag.text.strip()
                     rating = float(rating_text.split()[0])
                 except (ValueError, IndexError):
-                    self.logger.warning(f"Could not parse rating for ASIN {asin}")
+                    self.logger.warning("Could not parse rating for ASIN %s", asin)
             
             sold_count = None
             bought_tag = box.select_one("span.a-size-base.a-color-secondary")
@@ -158,7 +161,7 @@ class AmazonService(ParserClass):
                         num = text.split("K")[0].replace("+", "").strip()
                         sold_count = int(float(num) * 1000)
                 except (ValueError, IndexError):
-                    self.logger.warning(f"Could not parse sold count for ASIN {asin}")
+                    self.logger.warning("Could not parse sold count for ASIN %s", asin)
             
             img_url = None
             img_tag = box.select_one("img.s-image")
@@ -179,23 +182,34 @@ class AmazonService(ParserClass):
             )
         
         except Exception as e:
-            self.logger.warning(f"Error parsing product box for ASIN {asin if 'asin' in locals() else 'unknown'}: {e}")
+            self.logger.warning("Error parsing product box for ASIN %s: %s", asin if 'asin' in locals() else 'unknown', e)
             return None
     
-    async def parse(self, product_name: str, debug: bool = False) -> List[ProductSchema]:
-        html_content = await self._async_request(product_name)
+    async def parse(self, product_name: str, debug: bool = False, deadline: Optional[float] = None,
+                    lane: Lane = Lane.INTERACTIVE, raise_errors: bool = False) -> List[ProductSchema]:
+        """With raise_errors, a failed fetch raises FetchError instead of returning no products."""
+        with profile_query(product_name, ParserSource.AMAZON.value):
+            return await self._parse(product_name, debug, deadline, lane, raise_errors)
+    
+    async def _parse(self, product_name: str, debug: bool, deadline: Optional[float],
+                     lane: Lane, raise_errors: bool) -> List[ProductSchema]:
+        from bs4 import BeautifulSoup
+
+        page = await self._async_request(product_name, deadline=deadline, lane=lane, raise_errors=raise_errors)
         
-        if not html_content:
+        if not page or not page.body:
+            if page and raise_errors:
+                raise FetchError("Empty response body from Amazon")
             return []
         
         if debug:
-            self._save_html_debug(html_content)
+            self._save_html_debug(page.body)
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(page.body, 'html.parser', from_encoding=page.encoding or 'utf-8')
         product_boxes = soup.find_all("div", {"data-component-type": "s-search-result"})
         
         if not product_boxes:
-            self.logger.warning(f"No products found for search term: {product_name}")
+            self.logger.warning("No products found for search term: %s", product_name)
             return []
         
         self.products = []
@@ -204,7 +218,8 @@ class AmazonService(ParserClass):
             if product:
                 self.products.append(product)
         
-        self.logger.info(f"Successfully parsed {len(self.products)} products for search term: {product_name}")
+        self.selector_health.check_drift()
+        self.logger.info("Successfully parsed %d products for search term: %s", len(self.products), product_name)
         return self.products
     
     async def parse_multiple(self, product_names: List[str], debug: bool = False) -> Dict[str, List[ProductSchema]]:
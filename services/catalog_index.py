@@ -0,0 +1,185 @@
+from schema import ProductSchema, ParserSource
+from logger import get_logger
+from query_normalization import canonicalize
+
+import sqlite3
+import threading
+import time
+
+from datetime import datetime
+from logging import Logger
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+
+class CatalogIndex:
+    """
+    Local store of every scraped product with an FTS5 index over titles.
+
+    Products are upserted by URL as results arrive, so the index stays current
+    incrementally. A query counts as fresh when it was scraped live within
+    `max_age_seconds`; fresh queries are answered from the index, ranked by
+    BM25, without touching the marketplaces.
+    """
+
+    def __init__(self, path: str = "catalog.db", max_age_seconds: float = 3600.0):
+        self.path: str = path
+        self.max_age_seconds: float = max_age_seconds
+        self.logger: Logger = get_logger("catalog-index")
+        self._lock: threading.Lock = threading.Lock()
+        self._conn: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS products (
+                id INTEGER PRIMARY KEY,
+                product_id TEXT NOT NULL,
+                source TEXT NOT NULL,
+                title TEXT NOT NULL,
+                price REAL NOT NULL,
+                rating REAL,
+                sold_out INTEGER,
+                views INTEGER,
+                image TEXT,
+                url TEXT NOT NULL UNIQUE,
+                parsed_date TEXT NOT NULL,
+                ingested_at REAL NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                title, content='products', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products BEGIN
+                INSERT INTO products_fts(rowid, title) VALUES (new.id, new.title);
+            END;
+            CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, title) VALUES ('delete', old.id, old.title);
+            END;
+            CREATE TRIGGER IF NOT EXISTS products_au AFTER UPDATE OF title ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, title) VALUES ('delete', old.id, old.title);
+                INSERT INTO products_fts(rowid, title) VALUES (new.id, new.title);
+            END;
+            CREATE TABLE IF NOT EXISTS scraped_queries (
+                query TEXT PRIMARY KEY,
+                scraped_at REAL NOT NULL,
+                result_count INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS query_results (
+                query TEXT NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (query, url)
+            );
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def tokens(query: str) -> List[str]:
+        if not query or not query.strip():
+            return []
+        return canonicalize(query).tokens
+
+    @classmethod
+    def query_key(cls, query: str) -> str:
+        return " ".join(cls.tokens(query))
+
+    def add_products(self, products: Iterable[ProductSchema], query: Optional[str] = None) -> int:
+        now: float = time.time()
+        rows = [
+            (
+                p.product_id, p.parsed_source.value, p.product_title, p.product_price,
+                p.product_rating, p.product_sold_out, p.product_views,
+                str(p.product_image) if p.product_image is not None else None,
+                str(p.product_url), p.product_parsed_date.isoformat(), now
+            )
+            for p in products
+        ]
+        with self._lock:
+            self._conn.executemany("""
+                INSERT INTO products (product_id, source, title, price, rating, sold_out, views,
+                                      image, url, parsed_date, ingested_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    title = excluded.title, price = excluded.price, rating = excluded.rating,
+                    sold_out = excluded.sold_out, views = excluded.views, image = excluded.image,
+                    parsed_date = excluded.parsed_date, ingested_at = excluded.ingested_at
+            """, rows)
+            if query is not None:
+                key: str = self.query_key(query)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO scraped_queries (query, scraped_at, result_count) VALUES (?, ?, ?)",
+                    (key, now, len(rows))
+                )
+                # Latest result set per query, read back by the batch planner to spot overlapping queries
+                self._conn.execute("DELETE FROM query_results WHERE query = ?", (key,))
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO query_results (query, url) VALUES (?, ?)", ((key, row[8]) for row in rows)
+                )
+            self._conn.commit()
+        return len(rows)
+
+    def is_fresh(self, query: str, max_age_seconds: Optional[float] = None) -> bool:
+        max_age: float = self.max_age_seconds if max_age_seconds is None else max_age_seconds
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT scraped_at, result_count FROM scraped_queries WHERE query = ?", (self.query_key(query),)
+            ).fetchone()
+        return row is not None and row["result_count"] > 0 and time.time() - row["scraped_at"] <= max_age
+
+    def result_urls(self, queries: Iterable[str]) -> Dict[str, FrozenSet[str]]:
+        """Product URLs returned by the last scrape of each query, keyed by query key."""
+        keys: List[str] = list(dict.fromkeys(key for key in map(self.query_key, queries) if key))
+        if not keys:
+            return {}
+        urls: Dict[str, Set[str]] = {}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT query, url FROM query_results WHERE query IN ({', '.join('?' * len(keys))})", keys
+            ).fetchall()
+        for row in rows:
+            urls.setdefault(row["query"], set()).add(row["url"])
+        return {key: frozenset(found) for key, found in urls.items()}
+
+    def _row_to_product(self, row: sqlite3.Row) -> ProductSchema:
+        return ProductSchema.model_construct(
+            product_id=row["product_id"],
+            parsed_source=ParserSource(row["source"]),
+            product_title=row["title"],
+            product_price=row["price"],
+            product_rating=row["rating"],
+            product_sold_out=row["sold_out"],
+            product_views=row["views"],
+            product_image=row["image"],
+            product_url=row["url"],
+            product_parsed_date=datetime.fromisoformat(row["parsed_date"])
+        )
+
+    def search(self, query: str, limit: int = 500, max_age_seconds: Optional[float] = None) -> List[ProductSchema]:
+        tokens: List[str] = self.tokens(query)
+        if not tokens:
+            return []
+
+        match: str = " ".join(f'"{token}"' for token in tokens)
+        sql: str = """
+            SELECT p.* FROM products_fts
+            JOIN products p ON p.id = products_fts.rowid
+            WHERE products_fts MATCH ?
+        """
+        params: list = [match]
+        if max_age_seconds is not None:
+            sql += " AND p.ingested_at >= ?"
+            params.append(time.time() - max_age_seconds)
+        sql += " ORDER BY bm25(products_fts) LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._row_to_product(row) for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+
+def get_catalog_index() -> CatalogIndex:
+    from config import get_config
+
+    config = get_config()
+    return CatalogIndex(config.CATALOG_PATH, config.CATALOG_MAX_AGE_SECONDS)
@@ -1,19 +1,24 @@
 from services.basic_service import ParserClass
+from services.selector_health import SelectorHealth, get_selector_health
+from services.transport import FetchError, FetchResult, Transport, get_transport
+from services.latency import LatencyTracker, get_latency_tracker, hedged_fetch
+from services.scheduler import AdmissionScheduler, Lane, get_scheduler
 from schema import ParserSource, ProductSchema
 from logger import get_logger
-from config import Config
+from profiling import profile_query
+from query_normalization import encode_query
+from config import get_config
 
-import aiohttp
 import asyncio
 import uuid
 import re
 
 from logging import Logger
-from typing import List, Dict, Optional
-from bs4 import BeautifulSoup
+from typing import List, Dict, Optional, TYPE_CHECKING
 from datetime import datetime
 
-config: Config = Config()
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 class EbayService(ParserClass):
     def __init__(self):
@@ -23,7 +28,6 @@ class EbayService(ParserClass):
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.9",
-            "Accept-Encoding": "gzip, deflate, br",
             "Connection": "keep-alive",
             "Upgrade-Insecure-Requests": "1",
             "Sec-Fetch-Dest": "document",
@@ -33,27 +37,33 @@ class EbayService(ParserClass):
             "Cache-Control": "max-age=0",
             "DNT": "1"
         }
-        self.base_url: str = config.EBAY_URL
+        self.base_url: str = get_config().EBAY_URL
         self.logger: Logger = get_logger("ebay-service")
+        self.transport: Transport = get_transport()
+        self.latency: LatencyTracker = get_latency_tracker(ParserSource.EBAY.value)
+        self.scheduler: AdmissionScheduler = get_scheduler(ParserSource.EBAY.value)
+        self.selector_health: SelectorHealth = get_selector_health(ParserSource.EBAY.value)
     
-    async def _async_request(self, prompt: str, timeout: int = 10) -> Optional[str]:
+    async def _async_request(self, prompt: str, timeout: int = 10, deadline: Optional[float] = None,
+                             lane: Lane = Lane.INTERACTIVE, raise_errors: bool = False) -> Optional[FetchResult]:
         REQUEST_URL: str = f"{self.base_url}{prompt}"
         try:
-            timeout_config = aiohttp.ClientTimeout(total=timeout)
-            async with aiohttp.ClientSession(timeout=timeout_config) as session:
-                async with session.get(REQUEST_URL, headers=self.headers) as response:
-                    if response.status == 200:
-                        self.logger.info(f"Connected to - {REQUEST_URL}")
-                        return await response.text()
-                    else:
-                        self.logger.error(f"Request failed with status {response.status} - {REQUEST_URL}")
-                        return None
+            async with self.scheduler.admit(lane):
+                page = await hedged_fetch(self.transport, REQUEST_URL, self.headers, timeout, self.latency, deadline=deadline)
+            if page.status == 200:
+                self.logger.info("Connected to - %s (%s)", REQUEST_URL, page.http_version)
+                return page
+            else:
+                error = ("Request failed with status %s - %s", page.status, REQUEST_URL)
         except asyncio.TimeoutError:
-            self.logger.error(f"Request timed out - {REQUEST_URL}")
-            return None
+            error = ("Request timed out - %s", REQUEST_URL)
         except Exception as e:
-            self.logger.error(f"Cannot connect to source - {REQUEST_URL}: {str(e)}")
-            return None
+            error = ("Cannot connect to source - %s: %s", REQUEST_URL, e)
+        
+        self.logger.error(*error)
+        if raise_errors:
+            raise FetchError(error[0] % error[1:])
+        return None
     
     def _parse_price(self, price_text: str) -> float:
         try:
@@ -70,10 +80,11 @@ class EbayService(ParserClass):
         except:
             return None
     
-    def _parse_product_card(self, card_html: BeautifulSoup) -> Optional[ProductSchema]:
+    def _parse_product_card(self, card_html: "BeautifulSoup") -> Optional[ProductSchema]:
         try:
             link_elem = card_html.find('a', class_='s-card__link')
             product_url = link_elem['href'] if link_elem else ""
+            self.selector_health.record("url", bool(product_url))
             
             if not product_url:
                 return None
@@ -84,6 +95,9 @@ class EbayService(ParserClass):
             price_elem = card_html.find('span', class_='su-styled-text primary bold large-1 s-card__price')
             product_price = self._parse_price(price_elem.text) if price_elem else 0.0
             
+            self.selector_health.record("title", bool(product_title))
+            self.selector_health.record("price", product_price > 0)
+            
             rating_container = card_html.find('div', class_='x-star-rating')
             product_rating = self._parse_rating(rating_container) if rating_container else None
             
@@ -111,22 +125,34 @@ class EbayService(ParserClass):
             )
         
         except Exception as e:
-            self.logger.error(f"Error parsing product card: {str(e)}")
+            self.logger.warning("Error parsing product card: %s", e)
             return None
     
-    async def parse(self, product_name: str) -> List[ProductSchema]:
+    async def parse(self, product_name: str, deadline: Optional[float] = None,
+                    lane: Lane = Lane.INTERACTIVE, raise_errors: bool = False) -> List[ProductSchema]:
+        """With raise_errors, a failed fetch raises FetchError instead of returning no products."""
+        with profile_query(product_name, ParserSource.EBAY.value):
+            return await self._parse(product_name, deadline, lane, raise_errors)
+    
+    async def _parse(self, product_name: str, deadline: Optional[float], lane: Lane,
+                     raise_errors: bool) -> List[ProductSchema]:
+        from bs4 import BeautifulSoup
+
         try:
-            search_query = product_name.replace(' ', '+')
-            html_content = await self._async_request(f"sch/i.html?_nkw={search_query}")
+            search_query = encode_query(product_name)
+            page = await self._async_request(f"sch/i.html?_nkw={search_query}", deadline=deadline, lane=lane,
+                                             raise_errors=raise_errors)
             
-            if not html_content:
+            if not page or not page.body:
                 self.logger.error("Failed to get response from eBay")
+                if raise_errors:
+                    raise FetchError("Failed to get response from eBay")
                 return []
             
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = BeautifulSoup(page.body, 'html.parser', from_encoding=page.encoding or 'utf-8')
             product_cards = soup.find_all('div', class_='su-card-container')
             
-            self.logger.info(f"Found {len(product_cards)} products for '{product_name}'")
+            self.logger.info("Found %d products for '%s'", len(product_cards), product_name)
             
             self.products = []
             for card in product_cards:
@@ -134,11 +160,14 @@ class EbayService(ParserClass):
                 if product:
                     self.products.append(product)
             
-            self.logger.info(f"Successfully parsed {len(self.products)} products")
+            self.selector_health.check_drift()
+            self.logger.info("Successfully parsed %d products", len(self.products))
             return self.products
         
+        except FetchError:
+            raise
         except Exception as e:
-            self.logger.error(f"Error in parse method: {str(e)}")
+            self.logger.error("Error in parse method: %s", e)
             return []
     
     async def parse_multiple(self, product_names: List[str]) -> Dict[str, List[ProductSchema]]:
@@ -0,0 +1,34 @@
+import asyncio
+import aiohttp
+
+from typing import Dict, Optional
+
+_sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+def _prune():
+    for loop, session in list(_sessions.items()):
+        if loop.is_closed() or session.closed:
+            del _sessions[loop]
+
+async def get_session(timeout: Optional[aiohttp.ClientTimeout] = None) -> aiohttp.ClientSession:
+    """
+    Shared keep-alive session for the running event loop, so every fetch on
+    the loop reuses the same connection pool instead of opening a new one.
+    """
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        _prune()
+        connector = aiohttp.TCPConnector(limit=100, limit_per_host=10, ttl_dns_cache=300)
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout or aiohttp.ClientTimeout(total=30)
+        )
+        _sessions[loop] = session
+    return session
+
+async def close_session():
+    loop = asyncio.get_running_loop()
+    session = _sessions.pop(loop, None)
+    if session is not None and not session.closed:
+        await session.close()
@@ -0,0 +1,182 @@
+from services.http_pool import get_session, close_session
+from logger import get_logger
+
+import asyncio
+import aiohttp
+import hashlib
+import io
+import os
+import threading
+
+from logging import Logger
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class ThumbnailCache:
+    """
+    Content-addressed on-disk thumbnail store.
+
+    Blobs are named by the SHA-256 of their bytes, so identical images served
+    under different URLs are stored once. A small per-URL index file maps the
+    URL hash to the blob. When the cache grows past `max_bytes` the least
+    recently used blobs are evicted.
+    """
+
+    def __init__(self, root: str = ".thumbnail_cache", max_bytes: int = 64 * 1024 * 1024):
+        self.root: str = root
+        self.max_bytes: int = max_bytes
+        self.blob_dir: str = os.path.join(root, "blobs")
+        self.index_dir: str = os.path.join(root, "urls")
+        self._lock: threading.Lock = threading.Lock()
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.index_dir, exist_ok=True)
+
+    @staticmethod
+    def url_key(url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, f"{digest}.jpg")
+
+    def lookup(self, url: str) -> Optional[str]:
+        index_path: str = os.path.join(self.index_dir, self.url_key(url))
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                blob_path: str = self._blob_path(f.read().strip())
+            os.utime(blob_path)
+            return blob_path
+        except OSError:
+            return None
+
+    def store(self, url: str, data: bytes) -> str:
+        digest: str = hashlib.sha256(data).hexdigest()
+        blob_path: str = self._blob_path(digest)
+        with self._lock:
+            if not os.path.exists(blob_path):
+                tmp_path: str = f"{blob_path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, blob_path)
+            with open(os.path.join(self.index_dir, self.url_key(url)), "w", encoding="utf-8") as f:
+                f.write(digest)
+            self._evict()
+        return blob_path
+
+    def _evict(self):
+        blobs: List[Tuple[float, int, str]] = []
+        total: int = 0
+        for name in os.listdir(self.blob_dir):
+            path: str = os.path.join(self.blob_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+        evicted: set = set()
+        for _, size, path in sorted(blobs):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            evicted.add(os.path.splitext(os.path.basename(path))[0])
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self._drop_index_entries(evicted)
+
+    def _drop_index_entries(self, digests: set):
+        if not digests:
+            return
+        for name in os.listdir(self.index_dir):
+            path: str = os.path.join(self.index_dir, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    digest: str = f.read().strip()
+                if digest in digests:
+                    os.remove(path)
+            except OSError:
+                continue
+
+
+class ImageService:
+    def __init__(self, cache: Optional[ThumbnailCache] = None, size: Tuple[int, int] = (160, 160),
+                 max_concurrency: int = 8, timeout: int = 10, max_image_bytes: int = 5 * 1024 * 1024):
+        self.cache: ThumbnailCache = cache or ThumbnailCache()
+        self.size: Tuple[int, int] = size
+        self.timeout: int = timeout
+        self.max_image_bytes: int = max_image_bytes
+        self.semaphore: asyncio.Semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.logger: Logger = get_logger("image-service")
+
+    def _thumbnail(self, data: bytes) -> Optional[bytes]:
+        try:
+            from PIL import Image
+        except ImportError:
+            # Without Pillow there is no thumbnail; caching full-size images would defeat the cache
+            return None
+
+        with Image.open(io.BytesIO(data)) as image:
+            image.thumbnail(self.size)
+            output = io.BytesIO()
+            image.convert("RGB").save(output, format="JPEG", quality=80, optimize=True)
+            return output.getvalue()
+
+    async def _download(self, url: str) -> Optional[str]:
+        async with self.semaphore:
+            try:
+                session = await get_session()
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                    if response.status != 200:
+                        self.logger.warning("Image request failed with status %s - %s", response.status, url)
+                        return None
+                    data: bytes = await response.content.read(self.max_image_bytes + 1)
+            except Exception as e:
+                self.logger.warning("Could not fetch image %s: %s", url, e)
+                return None
+
+        if len(data) > self.max_image_bytes:
+            self.logger.warning("Image too large, skipped - %s", url)
+            return None
+
+        try:
+            thumbnail: Optional[bytes] = await asyncio.to_thread(self._thumbnail, data)
+        except Exception as e:
+            self.logger.warning("Could not decode image %s: %s", url, e)
+            return None
+        if thumbnail is None:
+            self.logger.warning("Pillow is not installed, thumbnail not cached - %s", url)
+            return None
+        return self.cache.store(url, thumbnail)
+
+    async def fetch(self, url: str) -> Optional[str]:
+        cached: Optional[str] = self.cache.lookup(url)
+        if cached:
+            return cached
+
+        key: str = ThumbnailCache.url_key(url)
+        future = self.in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._download(url))
+            self.in_flight[key] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        return await future
+
+    async def fetch_many(self, urls: Iterable[Optional[str]]) -> Dict[str, Optional[str]]:
+        unique: List[str] = list(dict.fromkeys(str(url) for url in urls if url))
+        paths = await asyncio.gather(*(self.fetch(url) for url in unique))
+        return dict(zip(unique, paths))
+
+
+def load_thumbnails(urls: Iterable[Optional[str]], cache: Optional[ThumbnailCache] = None) -> Dict[str, Optional[str]]:
+    async def _run() -> Dict[str, Optional[str]]:
+        try:
+            return await ImageService(cache).fetch_many(urls)
+        finally:
+            await close_session()
+
+    return asyncio.run(_run())
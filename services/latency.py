@@ -0,0 +1,139 @@
+from services.transport import FetchResult, Transport
+
+import asyncio
+import threading
+import time
+
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+
+
+def remaining(deadline: Optional[float]) -> Optional[float]:
+    """Seconds left until a time.monotonic() deadline, or None when unbounded."""
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+class LatencyTracker:
+    def __init__(self, source: str, window: int = 500):
+        self.source: str = source
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.hedges: int = 0
+        self.hedge_wins: int = 0
+        self.timeouts: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    @property
+    def count(self) -> int:
+        return len(self.samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            if not self.samples:
+                return None
+            ordered = sorted(self.samples)
+        index: int = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        return {
+            "samples": self.count,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "timeouts": self.timeouts
+        }
+
+
+_trackers: Dict[str, LatencyTracker] = {}
+_trackers_lock: threading.Lock = threading.Lock()
+
+def get_latency_tracker(source: str) -> LatencyTracker:
+    with _trackers_lock:
+        if source not in _trackers:
+            _trackers[source] = LatencyTracker(source)
+        return _trackers[source]
+
+def latency_report() -> Dict[str, Dict[str, Optional[float]]]:
+    with _trackers_lock:
+        trackers = list(_trackers.values())
+    return {tracker.source: tracker.snapshot() for tracker in trackers}
+
+
+async def hedged_fetch(transport: Transport, url: str, headers: Dict[str, str], timeout: float,
+                       tracker: LatencyTracker, proxy: Optional[str] = None,
+                       deadline: Optional[float] = None, hedge_percentile: float = 95.0,
+                       min_samples: int = 20) -> FetchResult:
+    """
+    Fetch `url` within min(timeout, deadline). Once the tracker has enough
+    samples, a duplicate request is fired if the primary is still running
+    after the observed p95 latency; the first 200 response wins and the
+    other attempt is cancelled. Both attempts are awaited before returning,
+    so none outlives the call or leaves an unretrieved exception.
+
+    The hedge runs inside the caller's admission slot rather than taking
+    its own, so while it is in flight a source can have one request per
+    hedged fetch above SCHEDULER_MAX_CONCURRENCY.
+    """
+    budget: float = timeout if deadline is None else min(timeout, remaining(deadline))
+    if budget <= 0:
+        tracker.timeouts += 1
+        raise asyncio.TimeoutError("Deadline expired before request")
+    end: float = time.monotonic() + budget
+
+    async def attempt() -> FetchResult:
+        started: float = time.monotonic()
+        result: FetchResult = await transport.fetch(url, headers, max(0.001, end - started), proxy=proxy)
+        if result.status == 200:
+            tracker.record(time.monotonic() - started)
+        return result
+
+    primary: asyncio.Future = asyncio.ensure_future(attempt())
+    started: List[asyncio.Future] = [primary]
+    tasks: Set[asyncio.Future] = {primary}
+    last_result: Optional[FetchResult] = None
+    last_error: Optional[BaseException] = None
+
+    try:
+        hedge_after: Optional[float] = tracker.percentile(hedge_percentile) if tracker.count >= min_samples else None
+        if hedge_after is not None and hedge_after < budget:
+            await asyncio.wait(tasks, timeout=hedge_after)
+            if not primary.done():
+                tracker.hedges += 1
+                started.append(asyncio.ensure_future(attempt()))
+                tasks.add(started[-1])
+
+        while tasks:
+            left: float = end - time.monotonic()
+            if left <= 0:
+                break
+            done, tasks = await asyncio.wait(tasks, timeout=left, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    last_error = task.exception()
+                    continue
+                result: FetchResult = task.result()
+                if result.status == 200:
+                    if task is not primary:
+                        tracker.hedge_wins += 1
+                    return result
+                last_result = result
+
+        if last_result is not None:
+            return last_result
+        if last_error is not None and not tasks:
+            raise last_error
+        tracker.timeouts += 1
+        raise asyncio.TimeoutError(f"No response from {url} within {budget:.2f}s")
+    finally:
+        for task in started:
+            task.cancel()
+        # Also collects attempts that finished with an error alongside the winner
+        await asyncio.gather(*started, return_exceptions=True)
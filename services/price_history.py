@@ -0,0 +1,174 @@
+from schema import ProductSchema
+from services.catalog_index import CatalogIndex
+from logger import get_logger
+
+import json
+import random
+import sqlite3
+import statistics
+import threading
+import time
+
+from collections import defaultdict
+from logging import Logger
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+GRANULARITIES: Dict[str, int] = {"hour": 3600, "day": 86400}
+ALL_SOURCES: str = "ALL"
+
+def bucket_start(timestamp: float, granularity: str) -> float:
+    size: int = GRANULARITIES[granularity]
+    return timestamp - timestamp % size
+
+
+class PriceHistory:
+    """
+    Incrementally maintained price rollups.
+
+    Every batch of scraped products updates, per hour and per day bucket:
+      - per product (keyed by URL): min / max / median / last price
+      - per query and source (plus ALL): min / max / median / mean price
+    Aggregates are stored materialized, so trend charts read a handful of
+    rows instead of scanning raw snapshots. Per-product medians are exact;
+    per-query medians come from a bounded reservoir of `reservoir_size`
+    prices per bucket.
+    """
+
+    def __init__(self, path: str = "catalog.db", reservoir_size: int = 512):
+        self.path: str = path
+        self.reservoir_size: int = reservoir_size
+        self.logger: Logger = get_logger("price-history")
+        self._rng: random.Random = random.Random()
+        self._lock: threading.Lock = threading.Lock()
+        self._conn: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS product_price_rollups (
+                product_url TEXT NOT NULL,
+                source TEXT NOT NULL,
+                granularity TEXT NOT NULL,
+                bucket_start REAL NOT NULL,
+                min_price REAL NOT NULL,
+                max_price REAL NOT NULL,
+                median_price REAL NOT NULL,
+                last_price REAL NOT NULL,
+                last_at REAL NOT NULL,
+                sample_count INTEGER NOT NULL,
+                prices TEXT NOT NULL,
+                PRIMARY KEY (product_url, granularity, bucket_start)
+            );
+            CREATE TABLE IF NOT EXISTS query_price_rollups (
+                query TEXT NOT NULL,
+                source TEXT NOT NULL,
+                granularity TEXT NOT NULL,
+                bucket_start REAL NOT NULL,
+                min_price REAL NOT NULL,
+                max_price REAL NOT NULL,
+                median_price REAL NOT NULL,
+                sum_price REAL NOT NULL,
+                sample_count INTEGER NOT NULL,
+                reservoir TEXT NOT NULL,
+                PRIMARY KEY (query, source, granularity, bucket_start)
+            );
+        """)
+        self._conn.commit()
+
+    def _update_product(self, url: str, source: str, granularity: str, bucket: float,
+                        prices: List[float], at: float):
+        row = self._conn.execute(
+            "SELECT prices FROM product_price_rollups WHERE product_url = ? AND granularity = ? AND bucket_start = ?",
+            (url, granularity, bucket)
+        ).fetchone()
+        values: List[float] = (json.loads(row["prices"]) if row else []) + prices
+        self._conn.execute("""
+            INSERT OR REPLACE INTO product_price_rollups
+                (product_url, source, granularity, bucket_start, min_price, max_price, median_price,
+                 last_price, last_at, sample_count, prices)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (url, source, granularity, bucket, min(values), max(values), statistics.median(values),
+              prices[-1], at, len(values), json.dumps(values)))
+
+    def _update_query(self, query: str, source: str, granularity: str, bucket: float, prices: List[float]):
+        row = self._conn.execute(
+            "SELECT min_price, max_price, sum_price, sample_count, reservoir FROM query_price_rollups "
+            "WHERE query = ? AND source = ? AND granularity = ? AND bucket_start = ?",
+            (query, source, granularity, bucket)
+        ).fetchone()
+
+        low, high, total, count = (row["min_price"], row["max_price"], row["sum_price"], row["sample_count"]) \
+            if row else (min(prices), max(prices), 0.0, 0)
+        reservoir: List[float] = json.loads(row["reservoir"]) if row else []
+        for price in prices:
+            count += 1
+            if len(reservoir) < self.reservoir_size:
+                reservoir.append(price)
+            else:
+                slot: int = self._rng.randrange(count)
+                if slot < self.reservoir_size:
+                    reservoir[slot] = price
+
+        self._conn.execute("""
+            INSERT OR REPLACE INTO query_price_rollups
+                (query, source, granularity, bucket_start, min_price, max_price, median_price,
+                 sum_price, sample_count, reservoir)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (query, source, granularity, bucket, min(low, min(prices)), max(high, max(prices)),
+              statistics.median(reservoir), total + sum(prices), count, json.dumps(reservoir)))
+
+    def record(self, products: Iterable[ProductSchema], query: str, at: Optional[float] = None) -> int:
+        at = time.time() if at is None else at
+        query_key: str = CatalogIndex.query_key(query)
+
+        by_product: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+        by_source: Dict[str, List[float]] = defaultdict(list)
+        for product in products:
+            if product.product_price <= 0:
+                continue
+            source: str = product.parsed_source.value
+            by_product[(str(product.product_url), source)].append(product.product_price)
+            by_source[source].append(product.product_price)
+            by_source[ALL_SOURCES].append(product.product_price)
+
+        if not by_product:
+            return 0
+
+        with self._lock:
+            try:
+                for granularity in GRANULARITIES:
+                    bucket: float = bucket_start(at, granularity)
+                    for (url, source), prices in by_product.items():
+                        self._update_product(url, source, granularity, bucket, prices, at)
+                    for source, prices in by_source.items():
+                        self._update_query(query_key, source, granularity, bucket, prices)
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return len(by_product)
+
+    def product_trend(self, product_url: str, granularity: str = "day", since: Optional[float] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT bucket_start, min_price, max_price, median_price, last_price, sample_count
+                FROM product_price_rollups
+                WHERE product_url = ? AND granularity = ? AND bucket_start >= ?
+                ORDER BY bucket_start
+            """, (product_url, granularity, since or 0)).fetchall()
+        return [dict(row) for row in rows]
+
+    def query_trend(self, query: str, granularity: str = "day", since: Optional[float] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT source, bucket_start, min_price, max_price, median_price,
+                       sum_price / sample_count AS mean_price, sample_count
+                FROM query_price_rollups
+                WHERE query = ? AND granularity = ? AND bucket_start >= ?
+                ORDER BY bucket_start, source
+            """, (CatalogIndex.query_key(query), granularity, since or 0)).fetchall()
+        return [dict(row) for row in rows]
+
+
+def get_price_history() -> PriceHistory:
+    from config import get_config
+    return PriceHistory(get_config().CATALOG_PATH)
@@ -0,0 +1,295 @@
+from schema import Lane
+from logger import get_logger
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from collections import deque
+from contextlib import asynccontextmanager
+from logging import Logger
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+
+
+class _Waiter:
+    __slots__ = ("lane", "tag", "loop", "future", "enqueued_at", "granted")
+
+    def __init__(self, lane: Lane, tag: float, loop: asyncio.AbstractEventLoop, future: asyncio.Future):
+        self.lane: Lane = lane
+        self.tag: float = tag
+        self.loop: asyncio.AbstractEventLoop = loop
+        self.future: asyncio.Future = future
+        self.enqueued_at: float = time.monotonic()
+        self.granted: bool = False
+
+
+class SharedBudget:
+    """
+    Host-wide admission budget kept in a SQLite file, so the lanes of
+    separate processes (dashboard, `cli.py --batch`, worker processes) draw
+    from one pool per marketplace. The in-process rules are enforced across
+    processes: at most `max_concurrency` slots per source, batch never takes
+    the last `reserved_interactive` slots and is held back while any process
+    has an interactive request waiting. Slots and waiting markers are leases,
+    so a crashed process cannot leak them.
+    """
+
+    def __init__(self, path: str = "admission.db", max_concurrency: int = 4, reserved_interactive: int = 1,
+                 lease_seconds: float = 60.0, waiting_seconds: float = 5.0):
+        self.path: str = path
+        self.max_concurrency: int = max(1, max_concurrency)
+        self.reserved_interactive: int = min(reserved_interactive, self.max_concurrency - 1)
+        self.lease_seconds: float = lease_seconds
+        self.waiting_seconds: float = waiting_seconds
+        self._lock: threading.Lock = threading.Lock()
+        self._conn: sqlite3.Connection = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS admission_slots (
+                token TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                lane TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS admission_waiting (
+                token TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+        """)
+
+    def try_acquire(self, source: str, lane: Lane, token: str) -> bool:
+        now: float = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM admission_slots WHERE expires_at < ?", (now,))
+                self._conn.execute("DELETE FROM admission_waiting WHERE expires_at < ?", (now,))
+                counts: Dict[str, int] = dict(self._conn.execute(
+                    "SELECT lane, COUNT(*) FROM admission_slots WHERE source = ? GROUP BY lane", (source,)
+                ).fetchall())
+                total: int = sum(counts.values())
+                if lane == Lane.BATCH:
+                    interactive_waiting = self._conn.execute(
+                        "SELECT 1 FROM admission_waiting WHERE source = ? LIMIT 1", (source,)
+                    ).fetchone()
+                    allowed: bool = (
+                        interactive_waiting is None and total < self.max_concurrency
+                        and counts.get(Lane.BATCH.value, 0) < self.max_concurrency - self.reserved_interactive
+                    )
+                else:
+                    allowed = total < self.max_concurrency
+
+                if allowed:
+                    self._conn.execute(
+                        "INSERT INTO admission_slots (token, source, lane, expires_at) VALUES (?, ?, ?, ?)",
+                        (token, source, lane.value, now + self.lease_seconds)
+                    )
+                    self._conn.execute("DELETE FROM admission_waiting WHERE token = ?", (token,))
+                elif lane == Lane.INTERACTIVE:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO admission_waiting (token, source, expires_at) VALUES (?, ?, ?)",
+                        (token, source, now + self.waiting_seconds)
+                    )
+                self._conn.execute("COMMIT")
+                return allowed
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def release(self, token: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM admission_slots WHERE token = ?", (token,))
+            self._conn.execute("DELETE FROM admission_waiting WHERE token = ?", (token,))
+
+    async def acquire(self, source: str, lane: Lane) -> str:
+        token: str = str(uuid.uuid4())
+        poll: float = 0.02 if lane == Lane.INTERACTIVE else 0.2
+        try:
+            while not await asyncio.to_thread(self.try_acquire, source, lane, token):
+                await asyncio.sleep(poll)
+        except BaseException:
+            await asyncio.shield(asyncio.to_thread(self.release, token))
+            raise
+        return token
+
+
+class AdmissionScheduler:
+    """
+    Admission control for one marketplace's request budget.
+
+    At most `max_concurrency` fetches run at once. Waiting requests are
+    ordered by weighted fair queuing across lanes (a request's tag is its
+    lane's previous finish tag plus 1/weight), so a fresh interactive request
+    is tagged ahead of a long batch backlog. On top of that, queued batch
+    work is held back while any interactive request is waiting, and batch
+    may never occupy the last `reserved_interactive` slots.
+
+    The scheduler is shared across threads and event loops in a process;
+    grants are delivered to each waiter's own loop. Lanes only compete inside
+    one process unless a `SharedBudget` is given: an admitted request then
+    also takes a host-wide slot before it runs.
+    """
+
+    def __init__(self, name: str, max_concurrency: int = 4, reserved_interactive: int = 1,
+                 weights: Optional[Dict[Lane, float]] = None, slo_seconds: Optional[Dict[Lane, float]] = None,
+                 window: int = 500, shared: Optional[SharedBudget] = None):
+        self.name: str = name
+        self.shared: Optional[SharedBudget] = shared
+        self.max_concurrency: int = max(1, max_concurrency)
+        self.reserved_interactive: int = min(reserved_interactive, self.max_concurrency - 1)
+        self.weights: Dict[Lane, float] = weights or {Lane.INTERACTIVE: 8.0, Lane.BATCH: 1.0}
+        self.slo_seconds: Dict[Lane, float] = slo_seconds or {Lane.INTERACTIVE: 0.5, Lane.BATCH: 60.0}
+        self.queues: Dict[Lane, Deque[_Waiter]] = {lane: deque() for lane in Lane}
+        self.in_flight: Dict[Lane, int] = {lane: 0 for lane in Lane}
+        self.lane_finish: Dict[Lane, float] = {lane: 0.0 for lane in Lane}
+        self.virtual_time: float = 0.0
+        self.waits: Dict[Lane, Deque[float]] = {lane: deque(maxlen=window) for lane in Lane}
+        self._lock: threading.Lock = threading.Lock()
+        self.logger: Logger = get_logger(f"scheduler-{name.lower()}")
+
+    def _total_in_flight(self) -> int:
+        return sum(self.in_flight.values())
+
+    def _eligible(self, lane: Lane) -> bool:
+        if not self.queues[lane]:
+            return False
+        if lane == Lane.BATCH:
+            if self.queues[Lane.INTERACTIVE]:
+                return False
+            return self.in_flight[Lane.BATCH] < self.max_concurrency - self.reserved_interactive
+        return True
+
+    def _dispatch(self):
+        while self._total_in_flight() < self.max_concurrency:
+            heads = [self.queues[lane][0] for lane in Lane if self._eligible(lane)]
+            if not heads:
+                return
+            waiter: _Waiter = min(heads, key=lambda w: w.tag)
+            self.queues[waiter.lane].popleft()
+            self.in_flight[waiter.lane] += 1
+            self.virtual_time = max(self.virtual_time, waiter.tag - 1.0 / self.weights[waiter.lane])
+            waiter.granted = True
+            waiter.loop.call_soon_threadsafe(self._grant, waiter.future)
+
+    @staticmethod
+    def _grant(future: asyncio.Future):
+        if not future.done():
+            future.set_result(None)
+
+    def _release(self, lane: Lane):
+        with self._lock:
+            self.in_flight[lane] -= 1
+            self._dispatch()
+
+    def _withdraw(self, waiter: _Waiter):
+        with self._lock:
+            if waiter.granted:
+                self.in_flight[waiter.lane] -= 1
+            else:
+                self.queues[waiter.lane].remove(waiter)
+            self._dispatch()
+
+    @asynccontextmanager
+    async def admit(self, lane: Lane = Lane.INTERACTIVE) -> AsyncIterator[None]:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            start: float = max(self.virtual_time, self.lane_finish[lane])
+            tag: float = start + 1.0 / self.weights[lane]
+            self.lane_finish[lane] = tag
+            waiter = _Waiter(lane, tag, loop, loop.create_future())
+            self.queues[lane].append(waiter)
+            self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            self._withdraw(waiter)
+            raise
+
+        token: Optional[str] = None
+        if self.shared is not None:
+            try:
+                token = await self.shared.acquire(self.name, lane)
+            except BaseException:
+                self._release(lane)
+                raise
+
+        waited: float = time.monotonic() - waiter.enqueued_at
+        self.waits[lane].append(waited)
+        if waited > self.slo_seconds[lane]:
+            self.logger.warning("%s request waited %.2fs (SLO %.2fs)", lane.value, waited, self.slo_seconds[lane])
+
+        try:
+            yield
+        finally:
+            self._release(lane)
+            if token is not None:
+                await asyncio.to_thread(self.shared.release, token)
+
+    def report(self) -> Dict[str, Dict[str, Optional[float]]]:
+        with self._lock:
+            snapshot = {lane: (sorted(self.waits[lane]), len(self.queues[lane]), self.in_flight[lane]) for lane in Lane}
+
+        report: Dict[str, Dict[str, Optional[float]]] = {}
+        for lane, (waits, queued, in_flight) in snapshot.items():
+            slo: float = self.slo_seconds[lane]
+            report[lane.value] = {
+                "queued": queued,
+                "in_flight": in_flight,
+                "p50_wait": waits[len(waits) // 2] if waits else None,
+                "p95_wait": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else None,
+                "slo": slo,
+                "slo_attainment": sum(1 for w in waits if w <= slo) / len(waits) if waits else None
+            }
+        return report
+
+
+_schedulers: Dict[str, AdmissionScheduler] = {}
+_schedulers_lock: threading.Lock = threading.Lock()
+_shared_budgets: Dict[Tuple[int, str], SharedBudget] = {}
+
+def get_shared_budget() -> Optional[SharedBudget]:
+    from config import get_config
+
+    config = get_config()
+    if not config.SCHEDULER_SHARED_PATH:
+        return None
+    # One connection per process: SQLite handles must not cross a fork
+    key = (os.getpid(), config.SCHEDULER_SHARED_PATH)
+    if key not in _shared_budgets:
+        _shared_budgets[key] = SharedBudget(
+            config.SCHEDULER_SHARED_PATH,
+            max_concurrency=config.SCHEDULER_MAX_CONCURRENCY,
+            reserved_interactive=config.SCHEDULER_RESERVED_INTERACTIVE
+        )
+    return _shared_budgets[key]
+
+def get_scheduler(source: str) -> AdmissionScheduler:
+    with _schedulers_lock:
+        if source not in _schedulers:
+            from config import get_config
+
+            config = get_config()
+            _schedulers[source] = AdmissionScheduler(
+                source,
+                max_concurrency=config.SCHEDULER_MAX_CONCURRENCY,
+                reserved_interactive=config.SCHEDULER_RESERVED_INTERACTIVE,
+                weights={Lane.INTERACTIVE: config.SCHEDULER_INTERACTIVE_WEIGHT, Lane.BATCH: 1.0},
+                slo_seconds={
+                    Lane.INTERACTIVE: config.SLO_INTERACTIVE_SECONDS,
+                    Lane.BATCH: config.SLO_BATCH_SECONDS
+                },
+                shared=get_shared_budget()
+            )
+        return _schedulers[source]
+
+def scheduler_report() -> Dict[str, Dict[str, Dict[str, Optional[float]]]]:
+    with _schedulers_lock:
+        schedulers = list(_schedulers.values())
+    return {scheduler.name: scheduler.report() for scheduler in schedulers}
@@ -0,0 +1,154 @@
+from logger import get_logger
+
+import threading
+
+from collections import deque
+from logging import Logger
+from typing import Any, Callable, Deque, Dict, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+
+class SelectorChain:
+    """
+    Ordered CSS selector fallbacks for one field.
+
+    Every lookup records hits per selector; every `reorder_every` lookups the
+    chain is re-sorted by hit rate so the selector that currently matches the
+    marketplace markup is tried first.
+    """
+
+    def __init__(self, field: str, selectors: List[str], reorder_every: int = 50):
+        self.field: str = field
+        self.selectors: List[str] = list(selectors)
+        self.reorder_every: int = reorder_every
+        self.hits: Dict[str, int] = {selector: 0 for selector in selectors}
+        self.attempts: Dict[str, int] = {selector: 0 for selector in selectors}
+        self._rank: Dict[str, int] = {selector: i for i, selector in enumerate(selectors)}
+        self._lookups: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def hit_rate(self, selector: str) -> float:
+        return (self.hits[selector] + 1) / (self.attempts[selector] + 2)
+
+    def _reorder(self):
+        self.selectors = sorted(self.selectors, key=lambda s: (-self.hit_rate(s), self._rank[s]))
+
+    def select(self, box: "BeautifulSoup", accept: Optional[Callable[[Any], bool]] = None) -> Optional[Any]:
+        found = None
+        tried: List[str] = []
+        for selector in self.selectors:
+            tag = box.select_one(selector)
+            tried.append(selector)
+            if tag is not None and (accept is None or accept(tag)):
+                found = tag
+                break
+
+        with self._lock:
+            for selector in tried:
+                self.attempts[selector] += 1
+            if found is not None:
+                self.hits[tried[-1]] += 1
+            self._lookups += 1
+            if self._lookups % self.reorder_every == 0:
+                self._reorder()
+        return found
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "order": list(self.selectors),
+                "hit_rates": {s: round(self.hit_rate(s), 3) for s in self.selectors},
+                "attempts": dict(self.attempts)
+            }
+
+
+class SelectorHealth:
+    """
+    Per-marketplace extraction coverage: the share of product boxes for which
+    each field was extracted, over a rolling window. A field whose coverage
+    falls below `drift_threshold` of its best observed coverage is flagged
+    as drifted (logged once per transition and counted in `snapshot()`).
+    """
+
+    def __init__(self, marketplace: str, window: int = 200, min_samples: int = 50,
+                 drift_threshold: float = 0.7):
+        self.marketplace: str = marketplace
+        self.window: int = window
+        self.min_samples: int = min_samples
+        self.drift_threshold: float = drift_threshold
+        self.chains: Dict[str, SelectorChain] = {}
+        self.samples: Dict[str, Deque[bool]] = {}
+        self.peak_coverage: Dict[str, float] = {}
+        self.drifted: Dict[str, bool] = {}
+        self.drift_events: Dict[str, int] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self.logger: Logger = get_logger(f"selector-health-{marketplace.lower()}")
+
+    def chain(self, field: str, selectors: List[str]) -> SelectorChain:
+        with self._lock:
+            if field not in self.chains:
+                self.chains[field] = SelectorChain(field, selectors)
+            return self.chains[field]
+
+    def record(self, field: str, extracted: bool):
+        with self._lock:
+            if field not in self.samples:
+                self.samples[field] = deque(maxlen=self.window)
+            self.samples[field].append(extracted)
+
+    def coverage(self, field: str) -> Optional[float]:
+        with self._lock:
+            samples = self.samples.get(field)
+            if not samples:
+                return None
+            return sum(samples) / len(samples)
+
+    def check_drift(self) -> List[str]:
+        drifted: List[str] = []
+        with self._lock:
+            for field, samples in self.samples.items():
+                if len(samples) < self.min_samples:
+                    continue
+                coverage: float = sum(samples) / len(samples)
+                peak: float = max(self.peak_coverage.get(field, 0.0), coverage)
+                self.peak_coverage[field] = peak
+                is_drifted: bool = peak > 0 and coverage < peak * self.drift_threshold
+                if is_drifted:
+                    drifted.append(field)
+                    if not self.drifted.get(field):
+                        self.drift_events[field] = self.drift_events.get(field, 0) + 1
+                        self.logger.warning(
+                            "Selector drift on %s.%s: coverage %.0f%% vs peak %.0f%%",
+                            self.marketplace, field, coverage * 100, peak * 100
+                        )
+                elif self.drifted.get(field):
+                    self.logger.info("%s.%s coverage recovered to %.0f%%", self.marketplace, field, coverage * 100)
+                self.drifted[field] = is_drifted
+        return drifted
+
+    def snapshot(self) -> Dict[str, Any]:
+        fields = list(self.samples)
+        return {
+            "marketplace": self.marketplace,
+            "coverage": {field: self.coverage(field) for field in fields},
+            "drifted": {field: self.drifted.get(field, False) for field in fields},
+            "drift_events": dict(self.drift_events),
+            "selectors": {field: chain.snapshot() for field, chain in self.chains.items()}
+        }
+
+
+_registry: Dict[str, SelectorHealth] = {}
+_registry_lock: threading.Lock = threading.Lock()
+
+def get_selector_health(marketplace: str) -> SelectorHealth:
+    with _registry_lock:
+        if marketplace not in _registry:
+            _registry[marketplace] = SelectorHealth(marketplace)
+        return _registry[marketplace]
+
+def selector_metrics() -> Dict[str, Dict[str, Any]]:
+    with _registry_lock:
+        health = list(_registry.values())
+    return {item.marketplace: item.snapshot() for item in health}
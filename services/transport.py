@@ -0,0 +1,174 @@
+from logger import get_logger
+
+import asyncio
+import importlib.util
+
+from logging import Logger
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+HOP_BY_HOP_HEADERS = {"connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade"}
+
+class FetchResult(NamedTuple):
+    status: int
+    body: bytes
+    encoding: Optional[str]
+    http_version: str
+
+class FetchError(Exception):
+    """A marketplace page could not be fetched (blocked, timed out, bad status)."""
+
+def _has_module(*names: str) -> bool:
+    for name in names:
+        try:
+            if importlib.util.find_spec(name) is not None:
+                return True
+        except (ImportError, ValueError):
+            # find_spec imports the parent package of dotted names
+            continue
+    return False
+
+def supported_encodings(zstd_modules: Tuple[str, ...] = (),
+                        brotli_modules: Tuple[str, ...] = ("brotli", "brotlicffi")) -> List[str]:
+    """Content codings a client backed by these decoder modules can actually decode, best first."""
+    encodings: List[str] = []
+    if _has_module(*zstd_modules):
+        encodings.append("zstd")
+    if _has_module(*brotli_modules):
+        encodings.append("br")
+    encodings.extend(["gzip", "deflate"])
+    return encodings
+
+def _charset(content_type: Optional[str]) -> Optional[str]:
+    if not content_type:
+        return None
+    for part in content_type.split(";")[1:]:
+        key, _, value = part.strip().partition("=")
+        if key.lower() == "charset" and value:
+            return value.strip('"\' ').lower()
+    return None
+
+
+class Transport:
+    # Decoder modules the underlying HTTP client uses for each coding
+    ZSTD_MODULES: Tuple[str, ...] = ()
+    BROTLI_MODULES: Tuple[str, ...] = ("brotli", "brotlicffi")
+
+    def __init__(self):
+        self.logger: Logger = get_logger("transport")
+        self.accept_encoding: str = ", ".join(supported_encodings(self.ZSTD_MODULES, self.BROTLI_MODULES))
+
+    def prepare_headers(self, headers: Dict[str, str]) -> Dict[str, str]:
+        prepared: Dict[str, str] = dict(headers)
+        prepared["Accept-Encoding"] = self.accept_encoding
+        return prepared
+
+    async def fetch(self, url: str, headers: Dict[str, str], timeout: float,
+                    proxy: Optional[str] = None) -> FetchResult:
+        raise NotImplementedError("Transport must implement the fetch method")
+
+    async def close(self):
+        pass
+
+
+class AiohttpTransport(Transport):
+    """HTTP/1.1 over the shared keep-alive aiohttp pool."""
+
+    ZSTD_MODULES = ("compression.zstd", "backports.zstd")
+
+    async def fetch(self, url: str, headers: Dict[str, str], timeout: float,
+                    proxy: Optional[str] = None) -> FetchResult:
+        import aiohttp
+        from services.http_pool import get_session
+
+        session = await get_session()
+        request_kwargs = {
+            "headers": self.prepare_headers(headers),
+            "allow_redirects": True,
+            "timeout": aiohttp.ClientTimeout(total=timeout)
+        }
+        if proxy:
+            request_kwargs["proxy"] = proxy
+
+        async with session.get(url, **request_kwargs) as response:
+            body: bytes = await response.read()
+            return FetchResult(response.status, body, response.charset, "HTTP/1.1")
+
+    async def close(self):
+        from services.http_pool import close_session
+        await close_session()
+
+
+class Http2Transport(Transport):
+    """
+    HTTP/2 through httpx: requests to the same host are multiplexed over one
+    connection per event loop (and proxy). Requires `httpx[http2]`.
+    """
+
+    ZSTD_MODULES = ("zstandard",)
+
+    def __init__(self):
+        super().__init__()
+        if not _has_module("httpx") or not _has_module("h2"):
+            raise ImportError("HTTP/2 transport requires httpx with HTTP/2 support: pip install 'httpx[http2]'")
+        self.clients: Dict[Tuple[asyncio.AbstractEventLoop, Optional[str]], object] = {}
+
+    def prepare_headers(self, headers: Dict[str, str]) -> Dict[str, str]:
+        prepared: Dict[str, str] = super().prepare_headers(headers)
+        return {key: value for key, value in prepared.items() if key.lower() not in HOP_BY_HOP_HEADERS}
+
+    def _client(self, proxy: Optional[str]):
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        for key in [key for key in self.clients if key[0].is_closed()]:
+            del self.clients[key]
+
+        client = self.clients.get((loop, proxy))
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=True,
+                proxy=proxy,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+            self.clients[(loop, proxy)] = client
+        return client
+
+    async def fetch(self, url: str, headers: Dict[str, str], timeout: float,
+                    proxy: Optional[str] = None) -> FetchResult:
+        import httpx
+
+        client = self._client(proxy)
+        try:
+            response = await client.get(url, headers=self.prepare_headers(headers), timeout=timeout)
+        except httpx.TimeoutException as e:
+            raise asyncio.TimeoutError(str(e)) from e
+        return FetchResult(
+            response.status_code,
+            response.content,
+            _charset(response.headers.get("content-type")),
+            response.http_version
+        )
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        for key in [key for key in self.clients if key[0] is loop]:
+            await self.clients.pop(key).aclose()
+
+
+_transports: Dict[str, Transport] = {}
+
+def get_transport(mode: Optional[str] = None) -> Transport:
+    if mode is None:
+        from config import get_config
+        mode = get_config().HTTP_TRANSPORT
+    mode = mode.lower()
+
+    if mode not in _transports:
+        if mode == "http2":
+            _transports[mode] = Http2Transport()
+        elif mode == "http1":
+            _transports[mode] = AiohttpTransport()
+        else:
+            raise ValueError(f"Unknown HTTP transport: {mode}")
+    return _transports[mode]
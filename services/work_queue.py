@@ -0,0 +1,491 @@
+from schema import ProductSchema, ParserSource, JobStatus, Lane, WorkJob
+from logger import get_logger
+from query_normalization import canonicalize
+
+import asyncio
+import sqlite3
+import threading
+import time
+import uuid
+
+from logging import Logger
+from typing import List, Dict, Optional
+
+
+class WorkQueue:
+    """
+    Lease-based queue of (query, source) scrape jobs.
+
+    A job is leased by exactly one worker at a time, interactive jobs before
+    batch ones. If the worker does not ack or nack before the lease expires
+    the job becomes visible again, until max_attempts is exhausted. Acks are idempotent: acking a finished job is a
+    no-op and acking with a stale lease token is rejected.
+    """
+
+    def __init__(self, lease_seconds: int = 60, max_attempts: int = 3):
+        self.lease_seconds: int = lease_seconds
+        self.max_attempts: int = max_attempts
+        self.logger: Logger = get_logger("work-queue")
+
+    def enqueue(self, query: str, source: ParserSource, job_id: Optional[str] = None,
+                lane: Lane = Lane.BATCH) -> str:
+        raise NotImplementedError("WorkQueue must implement the enqueue method")
+
+    def lease(self, worker_id: str, lease_seconds: Optional[int] = None) -> Optional[WorkJob]:
+        raise NotImplementedError("WorkQueue must implement the lease method")
+
+    def ack(self, job: WorkJob, products: List[ProductSchema]) -> bool:
+        raise NotImplementedError("WorkQueue must implement the ack method")
+
+    def nack(self, job: WorkJob, error: str) -> bool:
+        raise NotImplementedError("WorkQueue must implement the nack method")
+
+    def get_job(self, job_id: str) -> Optional[WorkJob]:
+        raise NotImplementedError("WorkQueue must implement the get_job method")
+
+    def results(self, job_id: str) -> Optional[List[ProductSchema]]:
+        """
+        Products acked for a finished job. Payloads are written by our own
+        workers, so they are decoded without revalidation and their URL
+        fields are plain strings.
+        """
+        raise NotImplementedError("WorkQueue must implement the results method")
+
+    def submit(self, query: str, sources: Optional[List[ParserSource]] = None,
+               lane: Lane = Lane.BATCH) -> List[str]:
+        query = canonicalize(query).text
+        return [self.enqueue(query, source, lane=lane) for source in (sources or list(ParserSource))]
+
+    async def wait(self, job_ids: List[str], timeout: float = 60.0,
+                   poll_interval: float = 0.25) -> Dict[str, List[ProductSchema]]:
+        deadline: float = time.monotonic() + timeout
+        collected: Dict[str, List[ProductSchema]] = {}
+        pending: List[str] = list(job_ids)
+
+        while pending:
+            for job_id in list(pending):
+                job = self.get_job(job_id)
+                if job is None or job.status == JobStatus.FAILED:
+                    collected[job_id] = []
+                    pending.remove(job_id)
+                elif job.status == JobStatus.DONE:
+                    collected[job_id] = self.results(job_id) or []
+                    pending.remove(job_id)
+
+            if not pending:
+                break
+            if time.monotonic() >= deadline:
+                self.logger.warning("Timed out waiting for %d job(s): %s", len(pending), ", ".join(pending))
+                for job_id in pending:
+                    collected[job_id] = []
+                break
+            await asyncio.sleep(poll_interval)
+
+        return collected
+
+
+class LocalWorkQueue(WorkQueue):
+    """In-process stand-in with the same lease semantics, intended for tests."""
+
+    def __init__(self, lease_seconds: int = 60, max_attempts: int = 3):
+        super().__init__(lease_seconds, max_attempts)
+        self._lock: threading.Lock = threading.Lock()
+        self._jobs: Dict[str, WorkJob] = {}
+        self._order: List[str] = []
+        self._results: Dict[str, List[ProductSchema]] = {}
+
+    def _reclaim_expired(self, now: float):
+        for job in self._jobs.values():
+            if job.status == JobStatus.LEASED and job.lease_expires is not None and job.lease_expires < now:
+                job.status = JobStatus.FAILED if job.attempts >= self.max_attempts else JobStatus.PENDING
+                job.lease_token = None
+                job.last_error = "lease expired"
+
+    def enqueue(self, query: str, source: ParserSource, job_id: Optional[str] = None,
+                lane: Lane = Lane.BATCH) -> str:
+        job_id = job_id or str(uuid.uuid4())
+        with self._lock:
+            if job_id not in self._jobs:
+                self._jobs[job_id] = WorkJob(job_id=job_id, query=query, source=source, lane=lane)
+                self._order.append(job_id)
+        return job_id
+
+    def lease(self, worker_id: str, lease_seconds: Optional[int] = None) -> Optional[WorkJob]:
+        now: float = time.time()
+        with self._lock:
+            self._reclaim_expired(now)
+            pending: List[WorkJob] = [self._jobs[job_id] for job_id in self._order
+                                      if self._jobs[job_id].status == JobStatus.PENDING]
+            for job in sorted(pending, key=lambda job: job.lane != Lane.INTERACTIVE):
+                job.status = JobStatus.LEASED
+                job.attempts += 1
+                job.lease_token = str(uuid.uuid4())
+                job.lease_expires = now + (lease_seconds or self.lease_seconds)
+                job.worker_id = worker_id
+                return job.model_copy()
+        return None
+
+    def ack(self, job: WorkJob, products: List[ProductSchema]) -> bool:
+        with self._lock:
+            stored = self._jobs.get(job.job_id)
+            if stored is None:
+                return False
+            if stored.status == JobStatus.DONE:
+                return True
+            if stored.lease_token != job.lease_token:
+                return False
+            self._results[job.job_id] = list(products)
+            stored.status = JobStatus.DONE
+            stored.lease_token = None
+            return True
+
+    def nack(self, job: WorkJob, error: str) -> bool:
+        with self._lock:
+            stored = self._jobs.get(job.job_id)
+            if stored is None or stored.lease_token != job.lease_token:
+                return False
+            stored.status = JobStatus.FAILED if stored.attempts >= self.max_attempts else JobStatus.PENDING
+            stored.lease_token = None
+            stored.last_error = error
+            return True
+
+    def get_job(self, job_id: str) -> Optional[WorkJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.model_copy() if job else None
+
+    def results(self, job_id: str) -> Optional[List[ProductSchema]]:
+        with self._lock:
+            products = self._results.get(job_id)
+            return list(products) if products is not None else None
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """Queue shared between processes on one host through a SQLite file."""
+
+    def __init__(self, path: str = "work_queue.db", lease_seconds: int = 60, max_attempts: int = 3):
+        super().__init__(lease_seconds, max_attempts)
+        self.path: str = path
+        self._lock: threading.Lock = threading.Lock()
+        self._conn: sqlite3.Connection = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                source TEXT NOT NULL,
+                lane TEXT NOT NULL DEFAULT 'BATCH',
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_token TEXT,
+                lease_expires REAL,
+                worker_id TEXT,
+                last_error TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at);
+            CREATE TABLE IF NOT EXISTS results (
+                job_id TEXT PRIMARY KEY,
+                payload BLOB NOT NULL,
+                created_at REAL NOT NULL
+            );
+        """)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "lane" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN lane TEXT NOT NULL DEFAULT 'BATCH'")
+
+    def _row_to_job(self, row: sqlite3.Row) -> WorkJob:
+        return WorkJob(
+            job_id=row["job_id"],
+            query=row["query"],
+            source=ParserSource(row["source"]),
+            lane=Lane(row["lane"]),
+            status=JobStatus(row["status"]),
+            attempts=row["attempts"],
+            lease_token=row["lease_token"],
+            lease_expires=row["lease_expires"],
+            worker_id=row["worker_id"],
+            last_error=row["last_error"]
+        )
+
+    def enqueue(self, query: str, source: ParserSource, job_id: Optional[str] = None,
+                lane: Lane = Lane.BATCH) -> str:
+        job_id = job_id or str(uuid.uuid4())
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (job_id, query, source, lane, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, query, source.value, lane.value, JobStatus.PENDING.value, time.time())
+            )
+        return job_id
+
+    def lease(self, worker_id: str, lease_seconds: Optional[int] = None) -> Optional[WorkJob]:
+        now: float = time.time()
+        token: str = str(uuid.uuid4())
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                    "lease_token = NULL, last_error = 'lease expired' "
+                    "WHERE status = ? AND lease_expires < ?",
+                    (self.max_attempts, JobStatus.FAILED.value, JobStatus.PENDING.value,
+                     JobStatus.LEASED.value, now)
+                )
+                row = self._conn.execute(
+                    "SELECT job_id FROM jobs WHERE status = ? ORDER BY lane = ? DESC, created_at LIMIT 1",
+                    (JobStatus.PENDING.value, Lane.INTERACTIVE.value)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_token = ?, "
+                    "lease_expires = ?, worker_id = ? WHERE job_id = ?",
+                    (JobStatus.LEASED.value, token, now + (lease_seconds or self.lease_seconds),
+                     worker_id, row["job_id"])
+                )
+                leased = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (row["job_id"],)).fetchone()
+                self._conn.execute("COMMIT")
+                return self._row_to_job(leased)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def ack(self, job: WorkJob, products: List[ProductSchema]) -> bool:
+        payload: bytes = ProductSchema.encode_many(products)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT status, lease_token FROM jobs WHERE job_id = ?", (job.job_id,)
+                ).fetchone()
+                if row is None or (row["status"] != JobStatus.DONE.value and row["lease_token"] != job.lease_token):
+                    self._conn.execute("COMMIT")
+                    return False
+                if row["status"] == JobStatus.DONE.value:
+                    self._conn.execute("COMMIT")
+                    return True
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results (job_id, payload, created_at) VALUES (?, ?, ?)",
+                    (job.job_id, payload, time.time())
+                )
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, lease_token = NULL WHERE job_id = ?",
+                    (JobStatus.DONE.value, job.job_id)
+                )
+                self._conn.execute("COMMIT")
+                return True
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def nack(self, job: WorkJob, error: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "lease_token = NULL, last_error = ? WHERE job_id = ? AND lease_token = ?",
+                (self.max_attempts, JobStatus.FAILED.value, JobStatus.PENDING.value,
+                 error, job.job_id, job.lease_token)
+            )
+            return cursor.rowcount == 1
+
+    def get_job(self, job_id: str) -> Optional[WorkJob]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def results(self, job_id: str) -> Optional[List[ProductSchema]]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM results WHERE job_id = ?", (job_id,)).fetchone()
+        return ProductSchema.decode_many(row["payload"]) if row else None
+
+
+# KEYS: interactive pending list, batch pending list, lease set.
+# ARGV: job key prefix, leased status, lease token, expiry, worker id
+_LEASE_SCRIPT: str = """
+local job_id = redis.call('LPOP', KEYS[1]) or redis.call('LPOP', KEYS[2])
+if not job_id then
+    return nil
+end
+local key = ARGV[1] .. job_id
+redis.call('HINCRBY', key, 'attempts', 1)
+redis.call('HSET', key, 'status', ARGV[2], 'lease_token', ARGV[3], 'lease_expires', ARGV[4], 'worker_id', ARGV[5])
+redis.call('ZADD', KEYS[3], ARGV[4], job_id)
+return redis.call('HGETALL', key)
+"""
+
+# KEYS: lease set, interactive pending list, batch pending list.
+# ARGV: now, job key prefix, max attempts, failed status, pending status, interactive lane
+_RECLAIM_SCRIPT: str = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+for _, job_id in ipairs(expired) do
+    redis.call('ZREM', KEYS[1], job_id)
+    local key = ARGV[2] .. job_id
+    if tonumber(redis.call('HGET', key, 'attempts') or 0) >= tonumber(ARGV[3]) then
+        redis.call('HSET', key, 'status', ARGV[4], 'lease_token', '', 'last_error', 'lease expired')
+    else
+        redis.call('HSET', key, 'status', ARGV[5], 'lease_token', '', 'last_error', 'lease expired')
+        if redis.call('HGET', key, 'lane') == ARGV[6] then
+            redis.call('RPUSH', KEYS[2], job_id)
+        else
+            redis.call('RPUSH', KEYS[3], job_id)
+        end
+    end
+end
+return #expired
+"""
+
+
+class RedisWorkQueue(WorkQueue):
+    """Queue shared between hosts through Redis. Requires the `redis` package."""
+
+    def __init__(self, url: str = "redis://localhost:6379/0", lease_seconds: int = 60,
+                 max_attempts: int = 3, prefix: str = "product-agregator"):
+        super().__init__(lease_seconds, max_attempts)
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RedisWorkQueue requires the 'redis' package: pip install redis") from e
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._redis_bytes = redis.Redis.from_url(url)
+        self._watch_error = redis.WatchError
+        self._lease_script = self._redis.register_script(_LEASE_SCRIPT)
+        self._reclaim_script = self._redis.register_script(_RECLAIM_SCRIPT)
+        self.prefix: str = prefix
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    def _result_key(self, job_id: str) -> str:
+        return f"{self.prefix}:result:{job_id}"
+
+    def _pending_key(self, lane: Lane) -> str:
+        # Batch jobs keep the original list name so jobs queued before lanes existed are still leased
+        return f"{self.prefix}:pending" if lane == Lane.BATCH else f"{self.prefix}:pending:{lane.value.lower()}"
+
+    @property
+    def _leases_key(self) -> str:
+        return f"{self.prefix}:leases"
+
+    def _hash_to_job(self, data: Dict[str, str]) -> WorkJob:
+        return WorkJob(
+            job_id=data["job_id"],
+            query=data["query"],
+            source=ParserSource(data["source"]),
+            lane=Lane(data.get("lane") or Lane.BATCH.value),
+            status=JobStatus(data["status"]),
+            attempts=int(data.get("attempts", 0)),
+            lease_token=data.get("lease_token") or None,
+            lease_expires=float(data["lease_expires"]) if data.get("lease_expires") else None,
+            worker_id=data.get("worker_id") or None,
+            last_error=data.get("last_error") or None
+        )
+
+    def _reclaim_expired(self, now: float):
+        self._reclaim_script(
+            keys=[self._leases_key, self._pending_key(Lane.INTERACTIVE), self._pending_key(Lane.BATCH)],
+            args=[now, self._job_key(""), self.max_attempts, JobStatus.FAILED.value, JobStatus.PENDING.value,
+                  Lane.INTERACTIVE.value]
+        )
+
+    def enqueue(self, query: str, source: ParserSource, job_id: Optional[str] = None,
+                lane: Lane = Lane.BATCH) -> str:
+        job_id = job_id or str(uuid.uuid4())
+        created: bool = self._redis.hsetnx(self._job_key(job_id), "job_id", job_id)
+        if created:
+            self._redis.hset(self._job_key(job_id), mapping={
+                "query": query, "source": source.value, "lane": lane.value,
+                "status": JobStatus.PENDING.value, "attempts": 0
+            })
+            self._redis.rpush(self._pending_key(lane), job_id)
+        return job_id
+
+    def lease(self, worker_id: str, lease_seconds: Optional[int] = None) -> Optional[WorkJob]:
+        now: float = time.time()
+        self._reclaim_expired(now)
+        expires: float = now + (lease_seconds or self.lease_seconds)
+        # Pop and lease in one script: a worker dying in between must not drop the job
+        fields: Optional[List[str]] = self._lease_script(
+            keys=[self._pending_key(Lane.INTERACTIVE), self._pending_key(Lane.BATCH), self._leases_key],
+            args=[self._job_key(""), JobStatus.LEASED.value, str(uuid.uuid4()), expires, worker_id]
+        )
+        if not fields:
+            return None
+        return self._hash_to_job(dict(zip(fields[::2], fields[1::2])))
+
+    def ack(self, job: WorkJob, products: List[ProductSchema]) -> bool:
+        key: str = self._job_key(job.job_id)
+        payload: bytes = ProductSchema.encode_many(products)
+        # Bytes client, so the binary result is written inside the same WATCH/MULTI transaction
+        with self._redis_bytes.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                status, token = (
+                    value.decode("utf-8") if value is not None else None
+                    for value in pipe.hmget(key, "status", "lease_token")
+                )
+                if status == JobStatus.DONE.value:
+                    return True
+                if status is None or token != job.lease_token:
+                    return False
+                pipe.multi()
+                pipe.set(self._result_key(job.job_id), payload)
+                pipe.hset(key, mapping={"status": JobStatus.DONE.value, "lease_token": ""})
+                pipe.zrem(self._leases_key, job.job_id)
+                pipe.execute()
+                return True
+            except self._watch_error:
+                return False
+
+    def nack(self, job: WorkJob, error: str) -> bool:
+        key: str = self._job_key(job.job_id)
+        with self._redis.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                token, attempts = pipe.hmget(key, "lease_token", "attempts")
+                if token != job.lease_token:
+                    return False
+                failed: bool = int(attempts or 0) >= self.max_attempts
+                pipe.multi()
+                pipe.hset(key, mapping={
+                    "status": JobStatus.FAILED.value if failed else JobStatus.PENDING.value,
+                    "lease_token": "", "last_error": error
+                })
+                pipe.zrem(self._leases_key, job.job_id)
+                if not failed:
+                    pipe.rpush(self._pending_key(job.lane), job.job_id)
+                pipe.execute()
+                return True
+            except self._watch_error:
+                return False
+
+    def get_job(self, job_id: str) -> Optional[WorkJob]:
+        data: Dict[str, str] = self._redis.hgetall(self._job_key(job_id))
+        return self._hash_to_job(data) if data else None
+
+    def results(self, job_id: str) -> Optional[List[ProductSchema]]:
+        payload: Optional[bytes] = self._redis_bytes.get(self._result_key(job_id))
+        return ProductSchema.decode_many(payload) if payload else None
+
+
+def get_work_queue(backend: Optional[str] = None, url: Optional[str] = None) -> WorkQueue:
+    from config import get_config
+
+    config = get_config()
+    backend = (backend or config.QUEUE_BACKEND).lower()
+    url = url or config.QUEUE_URL
+    options: Dict[str, int] = {
+        "lease_seconds": config.QUEUE_LEASE_SECONDS,
+        "max_attempts": config.QUEUE_MAX_ATTEMPTS
+    }
+
+    if backend == "sqlite":
+        return SQLiteWorkQueue(url, **options)
+    if backend == "redis":
+        return RedisWorkQueue(url, **options)
+    if backend == "local":
+        return LocalWorkQueue(**options)
+    raise ValueError(f"Unknown queue backend: {backend}")
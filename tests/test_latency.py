@@ -0,0 +1,94 @@
+import asyncio
+import gc
+import time
+
+import pytest
+
+from services.latency import LatencyTracker, hedged_fetch
+from services.transport import FetchResult
+
+def _tracker(p95: float = 0.01) -> LatencyTracker:
+    tracker = LatencyTracker("TEST")
+    for _ in range(20):
+        tracker.record(p95)
+    return tracker
+
+def _ok(body: bytes) -> FetchResult:
+    return FetchResult(200, body, "utf-8", "HTTP/1.1")
+
+class _ScriptedTransport:
+    """Runs one coroutine function per call, in order."""
+
+    def __init__(self, *calls):
+        self.calls = list(calls)
+        self.cancelled: int = 0
+
+    async def fetch(self, url, headers, timeout, proxy=None) -> FetchResult:
+        call = self.calls.pop(0)
+        try:
+            return await call()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+async def _slow() -> FetchResult:
+    await asyncio.sleep(10)
+    return _ok(b"slow")
+
+async def _fast() -> FetchResult:
+    return _ok(b"fast")
+
+def test_hedge_wins_over_slow_primary():
+    tracker = _tracker()
+    transport = _ScriptedTransport(_slow, _fast)
+
+    async def run() -> FetchResult:
+        return await hedged_fetch(transport, "http://test/", {}, 5.0, tracker)
+
+    result = asyncio.run(run())
+    assert result.body == b"fast"
+    assert tracker.hedges == 1 and tracker.hedge_wins == 1
+    assert transport.cancelled == 1
+
+def test_deadline_expiry_raises_timeout():
+    tracker = LatencyTracker("TEST")
+    transport = _ScriptedTransport(_slow)
+
+    async def run():
+        await hedged_fetch(transport, "http://test/", {}, 5.0, tracker, deadline=time.monotonic() + 0.05)
+
+    started: float = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+    assert time.monotonic() - started < 1.0
+    assert tracker.timeouts == 1 and transport.cancelled == 1
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(hedged_fetch(transport, "http://test/", {}, 5.0, tracker, deadline=time.monotonic() - 1))
+    assert tracker.timeouts == 2
+
+def test_no_unretrieved_attempt_exceptions():
+    unhandled = []
+
+    async def run():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unhandled.append(context))
+        both_done = asyncio.Event()
+
+        async def failing() -> FetchResult:
+            await both_done.wait()
+            raise ConnectionResetError("reset by peer")
+
+        async def winning() -> FetchResult:
+            # Finishes in the same loop iteration as the failing primary
+            both_done.set()
+            await asyncio.sleep(0)
+            return _ok(b"hedge")
+
+        result = await hedged_fetch(_ScriptedTransport(failing, winning), "http://test/", {}, 5.0, _tracker())
+        assert result.body == b"hedge"
+        gc.collect()
+
+    # Which of the two finished attempts is looked at first varies between runs
+    for _ in range(20):
+        asyncio.run(run())
+    assert unhandled == []
@@ -0,0 +1,64 @@
+from datetime import datetime
+from typing import Dict, List
+
+import pytest
+
+import query_normalization
+from config import get_config
+from schema import ParserSource, ProductSchema
+from services.catalog_index import CatalogIndex
+from services.scheduler import Lane
+
+RESULTS: Dict[str, List[str]] = {
+    "usb c hub": ["a", "b", "c", "d"],
+    "usb hub type c": ["a", "b", "c", "d", "e"],
+    "usb c cable": ["x", "y"]
+}
+
+class _FakeService:
+    def __init__(self, source: ParserSource):
+        self.source: ParserSource = source
+        self.calls: List[str] = []
+
+    async def parse(self, product_name: str, **kwargs) -> List[ProductSchema]:
+        self.calls.append(product_name)
+        return [
+            ProductSchema(
+                product_id=item,
+                parsed_source=self.source,
+                product_title=f"{product_name} {item}",
+                product_price=10.0,
+                product_url=f"https://{self.source.value.lower()}.example/{item}",
+                product_parsed_date=datetime.now()
+            )
+            for item in RESULTS[product_name]
+        ]
+
+@pytest.fixture
+def parser(monkeypatch, tmp_path):
+    monkeypatch.setenv("AMAZON_URL", "https://amazon.example/s?k=")
+    monkeypatch.setenv("EBAY_URL", "https://ebay.example/")
+    get_config.cache_clear()
+    from main_parser import MainParser
+
+    def build() -> MainParser:
+        # A fresh planner per parser stands in for a new cli process
+        monkeypatch.setattr(query_normalization, "_planner", None)
+        main_parser = MainParser(None, CatalogIndex(str(tmp_path / "catalog.db")), lane=Lane.BATCH)
+        main_parser.ebay_parser = _FakeService(ParserSource.EBAY)
+        main_parser.amazon_parser = _FakeService(ParserSource.AMAZON)
+        return main_parser
+
+    yield build
+    get_config.cache_clear()
+
+def test_search_many_shares_scrape_from_stored_overlap(parser):
+    first = parser()
+    first.search_many(["usb c hub", "usb hub type c", "usb c cable"])
+    assert sorted(first.ebay_parser.calls) == ["usb c cable", "usb c hub", "usb hub type c"]
+
+    second = parser()
+    results = second.search_many(["usb c hub", "usb hub type c", "usb c cable"], refresh=True)
+    assert sorted(second.ebay_parser.calls) == ["usb c cable", "usb c hub"]
+    assert results["usb hub type c"] == results["usb c hub"]
+    assert len(results["usb c cable"]) == 4
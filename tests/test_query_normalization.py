@@ -0,0 +1,28 @@
+from query_normalization import QueryPlanner, canonicalize, encode_query
+
+def test_equivalent_spellings_share_a_key():
+    keys = {canonicalize(query).key for query in ["iPhone 15", "IPHONE+15", "  iphone   15 ", "Ｉｐｈｏｎｅ　１５"]}
+    assert keys == {"iphone 15"}
+
+def test_stop_words_only_leave_the_key():
+    canonical = canonicalize("Case for the iPhone 15")
+    assert canonical.text == "case for the iphone 15"
+    assert canonical.key == "case iphone 15"
+    assert encode_query("c++ book") == "c%2B%2B+book"
+
+def test_planner_does_not_share_between_different_products():
+    plan = QueryPlanner().plan(["iphone 15 pro max", "iphone 15 pro max case", "iPhone  15 Pro Max"])
+    assert plan == {
+        "iphone 15 pro max": "iphone 15 pro max",
+        "iphone 15 pro max case": "iphone 15 pro max case",
+        "iPhone  15 Pro Max": "iphone 15 pro max"
+    }
+
+def test_planner_shares_on_observed_result_overlap():
+    planner = QueryPlanner(result_overlap=0.7)
+    planner.observe("usb c hub", ["a", "b", "c", "d"])
+    planner.observe("usb-c hub adapter", ["a", "b", "c", "d", "e"])
+    planner.observe("usb c cable", ["x", "y"])
+    plan = planner.plan(["usb c hub", "usb-c hub adapter", "usb c cable"])
+    assert plan["usb-c hub adapter"] == "usb c hub"
+    assert plan["usb c cable"] == "usb c cable"
@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+from services.scheduler import AdmissionScheduler, Lane, SharedBudget
+
+def _budgets(tmp_path, **kwargs):
+    # Two handles on one file stand in for two processes
+    path = str(tmp_path / "admission.db")
+    return SharedBudget(path, **kwargs), SharedBudget(path, **kwargs)
+
+def test_shared_budget_caps_concurrency_and_reserves_interactive(tmp_path):
+    dashboard, worker = _budgets(tmp_path, max_concurrency=2, reserved_interactive=1)
+    assert worker.try_acquire("EBAY", Lane.BATCH, "b1")
+    assert not worker.try_acquire("EBAY", Lane.BATCH, "b2")
+    assert dashboard.try_acquire("EBAY", Lane.INTERACTIVE, "i1")
+    assert not dashboard.try_acquire("EBAY", Lane.INTERACTIVE, "i2")
+    assert worker.try_acquire("AMAZON", Lane.BATCH, "b3")
+
+def test_waiting_interactive_holds_back_batch_in_other_process(tmp_path):
+    dashboard, worker = _budgets(tmp_path, max_concurrency=2, reserved_interactive=0)
+    assert worker.try_acquire("EBAY", Lane.BATCH, "b1")
+    assert worker.try_acquire("EBAY", Lane.BATCH, "b2")
+    assert not dashboard.try_acquire("EBAY", Lane.INTERACTIVE, "i1")
+
+    worker.release("b1")
+    assert not worker.try_acquire("EBAY", Lane.BATCH, "b3")
+    assert dashboard.try_acquire("EBAY", Lane.INTERACTIVE, "i1")
+    dashboard.release("i1")
+    assert worker.try_acquire("EBAY", Lane.BATCH, "b3")
+
+def test_expired_slots_are_reclaimed(tmp_path):
+    crashed, survivor = _budgets(tmp_path, max_concurrency=1, reserved_interactive=0, lease_seconds=0.05)
+    assert crashed.try_acquire("EBAY", Lane.INTERACTIVE, "lost")
+    assert not survivor.try_acquire("EBAY", Lane.INTERACTIVE, "i1")
+    time.sleep(0.1)
+    assert survivor.try_acquire("EBAY", Lane.INTERACTIVE, "i1")
+
+def test_scheduler_takes_and_returns_shared_slot(tmp_path):
+    shared, observer = _budgets(tmp_path, max_concurrency=1, reserved_interactive=0)
+    scheduler = AdmissionScheduler("EBAY", max_concurrency=4, shared=shared)
+
+    async def run():
+        async with scheduler.admit(Lane.INTERACTIVE):
+            assert not observer.try_acquire("EBAY", Lane.INTERACTIVE, "other")
+        observer.release("other")
+
+    asyncio.run(run())
+    assert observer.try_acquire("EBAY", Lane.INTERACTIVE, "other")
@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+import pytest
+
+from datetime import datetime
+from schema import JobStatus, Lane, ParserSource, ProductSchema
+from services.transport import FetchError
+from services.work_queue import LocalWorkQueue, SQLiteWorkQueue
+from worker import ScraperWorker
+
+LEASE_SECONDS: float = 0.05
+
+@pytest.fixture(params=["local", "sqlite"])
+def queue(request, tmp_path):
+    if request.param == "local":
+        return LocalWorkQueue(lease_seconds=60, max_attempts=2)
+    return SQLiteWorkQueue(str(tmp_path / "work_queue.db"), lease_seconds=60, max_attempts=2)
+
+def _product() -> ProductSchema:
+    return ProductSchema(
+        product_id="1",
+        parsed_source=ParserSource.EBAY,
+        product_title="iphone 15",
+        product_price=799.0,
+        product_url="https://www.ebay.com/itm/1",
+        product_parsed_date=datetime.now()
+    )
+
+def test_lease_is_exclusive(queue):
+    queue.enqueue("iphone 15", ParserSource.EBAY, job_id="a")
+    job = queue.lease("w1")
+    assert job.job_id == "a" and job.status == JobStatus.LEASED and job.attempts == 1
+    assert queue.lease("w2") is None
+
+def test_interactive_jobs_lease_before_batch_backlog(queue):
+    queue.enqueue("usb c hub", ParserSource.EBAY, job_id="backfill-1")
+    queue.enqueue("usb c cable", ParserSource.EBAY, job_id="backfill-2")
+    queue.submit("iPhone 15", sources=[ParserSource.EBAY], lane=Lane.INTERACTIVE)
+    first = queue.lease("w1")
+    assert first.query == "iphone 15" and first.lane == Lane.INTERACTIVE
+    assert queue.lease("w1").job_id == "backfill-1"
+
+def test_expired_lease_is_reclaimed(queue):
+    queue.enqueue("iphone 15", ParserSource.EBAY, job_id="a")
+    first = queue.lease("w1", lease_seconds=LEASE_SECONDS)
+    time.sleep(LEASE_SECONDS * 2)
+    second = queue.lease("w2")
+    assert second is not None and second.job_id == "a"
+    assert second.attempts == 2 and second.lease_token != first.lease_token
+
+def test_expired_lease_fails_after_max_attempts(queue):
+    queue.enqueue("iphone 15", ParserSource.EBAY, job_id="a")
+    for _ in range(queue.max_attempts):
+        assert queue.lease("w1", lease_seconds=LEASE_SECONDS) is not None
+        time.sleep(LEASE_SECONDS * 2)
+    assert queue.lease("w1") is None
+    job = queue.get_job("a")
+    assert job.status == JobStatus.FAILED and job.last_error == "lease expired"
+
+def test_nack_retries_until_max_attempts(queue):
+    queue.enqueue("iphone 15", ParserSource.EBAY, job_id="a")
+    assert queue.nack(queue.lease("w1"), "503")
+    assert queue.get_job("a").status == JobStatus.PENDING
+    assert queue.nack(queue.lease("w1"), "503")
+    job = queue.get_job("a")
+    assert job.status == JobStatus.FAILED and job.attempts == 2 and job.last_error == "503"
+    assert queue.lease("w1") is None
+
+def test_ack_is_idempotent(queue):
+    queue.enqueue("iphone 15", ParserSource.EBAY, job_id="a")
+    job = queue.lease("w1")
+    assert queue.ack(job, [_product()])
+    assert queue.ack(job, [])
+    assert queue.get_job("a").status == JobStatus.DONE
+    results = queue.results("a")
+    assert [str(product.product_url) for product in results] == ["https://www.ebay.com/itm/1"]
+
+def test_stale_lease_token_is_rejected(queue):
+    queue.enqueue("iphone 15", ParserSource.EBAY, job_id="a")
+    stale = queue.lease("w1", lease_seconds=LEASE_SECONDS)
+    time.sleep(LEASE_SECONDS * 2)
+    current = queue.lease("w2")
+    assert not queue.ack(stale, [_product()])
+    assert not queue.nack(stale, "late")
+    assert queue.results("a") is None
+    assert queue.ack(current, [])
+    assert queue.get_job("a").status == JobStatus.DONE
+
+
+class _RecordingService:
+    def __init__(self):
+        self.lanes = []
+
+    async def parse(self, product_name: str, **kwargs):
+        self.lanes.append(kwargs.get("lane"))
+        return [_product()]
+
+def test_worker_runs_job_in_its_lane(queue):
+    queue.submit("iphone 15", sources=[ParserSource.EBAY], lane=Lane.INTERACTIVE)
+    worker = ScraperWorker(queue, worker_id="w1")
+    worker.services[ParserSource.EBAY] = service = _RecordingService()
+
+    assert asyncio.run(worker.run_once())
+    assert service.lanes == [Lane.INTERACTIVE]
+
+
+class _FailingService:
+    async def parse(self, product_name: str, **kwargs):
+        assert kwargs.get("raise_errors")
+        raise FetchError("Request timed out")
+
+def test_worker_nacks_failed_fetch(queue):
+    queue.enqueue("iphone 15", ParserSource.EBAY, job_id="a")
+    worker = ScraperWorker(queue, worker_id="w1")
+    worker.services[ParserSource.EBAY] = _FailingService()
+
+    assert asyncio.run(worker.run_once())
+    job = queue.get_job("a")
+    assert job.status == JobStatus.PENDING and job.attempts == 1 and job.last_error == "Request timed out"
@@ -0,0 +1,111 @@
+from services.basic_service import ParserClass
+from services.work_queue import WorkQueue, get_work_queue
+from schema import ParserSource, WorkJob
+from logger import get_logger
+
+import argparse
+import asyncio
+import importlib
+import multiprocessing
+import os
+import socket
+
+from logging import Logger
+from typing import Dict, Optional
+
+SERVICES: Dict[ParserSource, str] = {
+    ParserSource.EBAY: "services.ebay_service:EbayService",
+    ParserSource.AMAZON: "services.amazon_service:AmazonService"
+}
+
+def load_service(source: ParserSource) -> ParserClass:
+    module_name, class_name = SERVICES[source].split(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+class ScraperWorker:
+    """
+    Stateless worker: leases (query, source) jobs, runs the matching
+    marketplace service in the job's admission lane and acks the parsed
+    products back to the queue.
+    """
+
+    def __init__(self, queue: WorkQueue, worker_id: Optional[str] = None,
+                 poll_interval: float = 1.0):
+        self.queue: WorkQueue = queue
+        self.worker_id: str = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.poll_interval: float = poll_interval
+        self.services: Dict[ParserSource, ParserClass] = {}
+        self.logger: Logger = get_logger("scraper-worker")
+
+    def _service(self, source: ParserSource) -> ParserClass:
+        if source not in self.services:
+            self.services[source] = load_service(source)
+        return self.services[source]
+
+    async def process(self, job: WorkJob) -> bool:
+        try:
+            # A failed fetch must raise so the job is retried, not acked as zero results
+            products = await self._service(job.source).parse(job.query, lane=job.lane, raise_errors=True)
+        except Exception as e:
+            self.logger.error("Job %s (%s: '%s') failed: %s", job.job_id, job.source.value, job.query, e)
+            self.queue.nack(job, str(e))
+            return False
+
+        if not self.queue.ack(job, products):
+            self.logger.warning("Lease lost for job %s, result discarded", job.job_id)
+            return False
+
+        self.logger.info("Job %s done - %d products from %s", job.job_id, len(products), job.source.value)
+        return True
+
+    async def run_once(self) -> bool:
+        job = self.queue.lease(self.worker_id)
+        if job is None:
+            return False
+        await self.process(job)
+        return True
+
+    async def run(self, max_jobs: Optional[int] = None, stop_when_idle: bool = False):
+        processed: int = 0
+        self.logger.info("Worker %s started", self.worker_id)
+        while max_jobs is None or processed < max_jobs:
+            if await self.run_once():
+                processed += 1
+            elif stop_when_idle:
+                break
+            else:
+                await asyncio.sleep(self.poll_interval)
+        self.logger.info("Worker %s stopped after %d job(s)", self.worker_id, processed)
+
+async def _run_worker(worker: ScraperWorker, stop_when_idle: bool):
+    from services.transport import get_transport
+
+    try:
+        await worker.run(stop_when_idle=stop_when_idle)
+    finally:
+        await get_transport().close()
+
+def _worker_main(backend: Optional[str], url: Optional[str], stop_when_idle: bool):
+    worker = ScraperWorker(get_work_queue(backend, url))
+    asyncio.run(_run_worker(worker, stop_when_idle))
+
+def run_workers(count: int, backend: Optional[str] = None, url: Optional[str] = None,
+                stop_when_idle: bool = False):
+    processes = [
+        multiprocessing.Process(target=_worker_main, args=(backend, url, stop_when_idle), daemon=True)
+        for _ in range(count)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Run stateless scraper workers against the work queue")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    arg_parser.add_argument("--backend", choices=["sqlite", "redis"], default=None)
+    arg_parser.add_argument("--url", default=None)
+    arg_parser.add_argument("--stop-when-idle", action="store_true")
+    args = arg_parser.parse_args()
+
+    run_workers(args.workers, args.backend, args.url, args.stop_when_idle)